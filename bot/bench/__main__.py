@@ -0,0 +1,175 @@
+import os
+import sys
+import socket
+import asyncio
+import argparse
+import tempfile
+import resource
+import statistics
+import time as tm
+import multiprocessing as mp
+
+from bot.config import settings
+from bot.utils.logger import logger
+from bot.bench.mock_api import MockConfig, run_server
+
+
+def get_rss_mb() -> float:
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def get_open_fds() -> int | None:
+    try:
+        return len(os.listdir('/proc/self/fd'))
+    except OSError:
+        return None
+
+
+def percentile(values: list[float], percent: float) -> float:
+    if not values:
+        return 0.0
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method='inclusive')[int(percent) - 1]
+
+
+def wait_for_port(host: str, port: int, timeout: float = 10) -> None:
+    deadline = tm.monotonic() + timeout
+    while tm.monotonic() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=1):
+                return
+        except OSError:
+            tm.sleep(0.1)
+
+    raise TimeoutError(f"Mock API did not start on {host}:{port}")
+
+
+async def run_session(name: str, cycles: int, latencies: list[float], errors: list[str]) -> None:
+    from bot.core.tapper import Tapper
+    from bot.utils.connection_manager import connection_manager
+
+    tapper = Tapper(session_name=name, proxy=None)
+    await tapper.init()
+
+    http_client = connection_manager.create_session(None, tapper.headers)
+    try:
+        for _ in range(cycles):
+            started = tm.perf_counter()
+            try:
+                await tapper.process_cycle(http_client=http_client)
+            except Exception as error:
+                errors.append(type(error).__name__)
+            latencies.append(tm.perf_counter() - started)
+    finally:
+        if tapper._refresh_loop is not None:
+            tapper._refresh_loop.cancel()
+        await connection_manager.close_session(http_client, None)
+
+
+async def run_benchmark(session_count: int, cycles: int) -> dict:
+    latencies, errors = [], []
+
+    started = tm.perf_counter()
+    await asyncio.gather(*[
+        run_session(f"bench-{session_count}-{index}", cycles, latencies, errors)
+        for index in range(session_count)
+    ])
+    elapsed = tm.perf_counter() - started
+
+    return {
+        'sessions': session_count,
+        'cycles': len(latencies),
+        'cycles_per_sec': len(latencies) / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'errors': len(errors),
+        'rss_mb': get_rss_mb(),
+        'open_fds': get_open_fds()
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    from bot.bench.fake_client import FakeClient
+    from bot.utils.auth_gate import auth_gate
+    from bot.utils.client_factory import tg_client_factory
+    from bot.utils.connection_manager import connection_manager
+    from bot.utils.rate_limiter import rate_limiter
+    from bot.utils.session_store import session_store
+
+    workdir = tempfile.mkdtemp(prefix='timefarm-bench-')
+    os.chdir(workdir)
+    settings.SESSION_STORE_PATH = session_store.path = os.path.join(workdir, 'store.db')
+    settings.API_BASE_URL = f"{args.api_url.rstrip('/')}/api/v1"
+    settings.USE_PROXY = False
+    settings.AUTO_UPGRADE_FARM = False
+    settings.CLAIM_RETRY = 1
+    tg_client_factory.create = FakeClient
+
+    # боевые лимиты (5 req/s на прокси, 1 авторизация/с на API_ID) измеряли бы сами себя, а не код
+    rate_limiter.rate = args.rate_limit
+    auth_gate.rate = args.auth_rate
+    auth_gate._semaphore = asyncio.Semaphore(args.auth_concurrency)
+
+    print(f"Request rate limit: {args.rate_limit or 'off'} req/s per proxy | "
+          f"Auth rate limit: {args.auth_rate or 'off'} auth/s per API_ID | "
+          f"Auth concurrency: {args.auth_concurrency}")
+    print(f"{'sessions':>9} {'cycles':>8} {'cycles/s':>10} {'p50 ms':>9} {'p99 ms':>9} "
+          f"{'errors':>7} {'rss MB':>8} {'fds':>6}")
+
+    for session_count in args.sessions:
+        result = await run_benchmark(session_count, args.cycles)
+        print(f"{result['sessions']:>9} {result['cycles']:>8} {result['cycles_per_sec']:>10.1f} "
+              f"{result['p50_ms']:>9.1f} {result['p99_ms']:>9.1f} {result['errors']:>7} "
+              f"{result['rss_mb']:>8.1f} {str(result['open_fds']):>6}")
+
+    await connection_manager.close_all()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="End-to-end load benchmark against the mock TimeFarm API")
+    parser.add_argument("--sessions", type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument("--cycles", type=int, default=3, help="Cycles per session")
+    parser.add_argument("--api-url", default=None, help="Use an already running mock API instead of spawning one")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, nargs=2, default=(0.0, 0.0), metavar=("MIN", "MAX"))
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--unauthorized-rate", type=float, default=0.0)
+    parser.add_argument("--forbidden-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=0.0,
+                        help="Requests per second per proxy, 0 disables the limiter")
+    parser.add_argument("--auth-rate", type=float, default=0.0,
+                        help="Telegram authorizations per second per API_ID, 0 disables pacing")
+    parser.add_argument("--auth-concurrency", type=int, default=1000)
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level='CRITICAL')
+
+    server = None
+    if args.api_url is None:
+        args.api_url = f"http://127.0.0.1:{args.port}"
+        config = MockConfig(
+            latency=tuple(args.latency),
+            error_rate=args.error_rate,
+            unauthorized_rate=args.unauthorized_rate,
+            forbidden_rate=args.forbidden_rate
+        )
+        server = mp.get_context('spawn').Process(target=run_server, args=('127.0.0.1', args.port, config), daemon=True)
+        server.start()
+        wait_for_port('127.0.0.1', args.port)
+
+    try:
+        asyncio.run(main(args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.join(timeout=5)
@@ -0,0 +1,33 @@
+import zlib
+
+from urllib.parse import quote
+from pyrogram.raw.types import InputPeerUser
+
+
+class FakeWebView:
+    def __init__(self, url: str):
+        self.url = url
+
+
+class FakeClient:
+    """Stands in for ``pyrogram.Client`` in benchmarks: no MTProto, no session file."""
+
+    def __init__(self, name: str, api_id: int = 1):
+        self.name = name
+        self.api_id = api_id
+        self.proxy = None
+        self.is_connected = False
+
+    async def connect(self) -> bool:
+        self.is_connected = True
+        return True
+
+    async def disconnect(self) -> None:
+        self.is_connected = False
+
+    async def resolve_peer(self, username: str) -> InputPeerUser:
+        return InputPeerUser(user_id=zlib.crc32(username.encode()), access_hash=zlib.crc32(self.name.encode()))
+
+    async def invoke(self, query) -> FakeWebView:
+        init_data = quote(f"user={self.name}&auth_date=0&hash=mock", safe='')
+        return FakeWebView(f"https://tg-tap-miniapp.laborx.io/#tgWebAppData={init_data}&tgWebAppVersion=7.10")
@@ -0,0 +1,223 @@
+import json
+import time as tm
+import base64
+import random
+import asyncio
+import argparse
+
+from datetime import datetime, timezone
+from aiohttp import web
+
+API_PREFIX = '/api/v1'
+
+
+class MockConfig:
+    def __init__(self, latency: tuple[float, float] = (0.0, 0.0), error_rate: float = 0.0,
+                 unauthorized_rate: float = 0.0, forbidden_rate: float = 0.0,
+                 farming_duration: int = 0, token_ttl: int = 3600):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.unauthorized_rate = unauthorized_rate
+        self.forbidden_rate = forbidden_rate
+        self.farming_duration = farming_duration
+        self.token_ttl = token_ttl
+
+
+class Account:
+    def __init__(self):
+        self.balance = 1000
+        self.level = 0
+        self.farm_started_at = None
+        self.stakes = []
+
+
+def make_token(user_id: str, ttl: int) -> str:
+    def encode(data: dict) -> str:
+        return base64.urlsafe_b64encode(json.dumps(data).encode()).rstrip(b'=').decode()
+
+    return f"{encode({'alg': 'none'})}.{encode({'sub': user_id, 'exp': int(tm.time()) + ttl})}.mock"
+
+
+def isoformat(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat().replace('+00:00', 'Z')
+
+
+class MockTimeFarmAPI:
+    LEVELS = [{'level': str(level), 'price': str(level * 100000), 'farmMultiplicator': level + 1}
+              for level in range(8)]
+    OPTIONS = [{'id': '1', 'duration': 1, 'percent': 5}, {'id': '2', 'duration': 3, 'percent': 20},
+               {'id': '3', 'duration': 7, 'percent': 60}]
+
+    def __init__(self, config: MockConfig):
+        self.config = config
+        self.accounts: dict[str, Account] = {}
+        self.tokens: dict[str, str] = {}
+        self.requests = 0
+
+    def build_app(self) -> web.Application:
+        app = web.Application(middlewares=[self.middleware])
+        app.router.add_post(f'{API_PREFIX}/auth/validate-init/v2', self.validate_init)
+        app.router.add_get(f'{API_PREFIX}/farming/info', self.farming_info)
+        app.router.add_post(f'{API_PREFIX}/farming/start', self.farming_start)
+        app.router.add_post(f'{API_PREFIX}/farming/finish', self.farming_finish)
+        app.router.add_post(f'{API_PREFIX}/me/level/upgrade', self.level_upgrade)
+        app.router.add_get(f'{API_PREFIX}/staking/active', self.staking_active)
+        app.router.add_post(f'{API_PREFIX}/staking', self.staking)
+        app.router.add_post(f'{API_PREFIX}/staking/claim', self.staking_claim)
+        app.router.add_get(f'{API_PREFIX}/tasks', self.tasks)
+        app.router.add_get(f'{API_PREFIX}/tasks/{{task_id}}', self.task)
+        app.router.add_post(f'{API_PREFIX}/tasks/{{task_id}}/claims', self.task_ok)
+        app.router.add_post(f'{API_PREFIX}/tasks/{{task_id}}/submissions', self.task_ok)
+        app.router.add_get('/ipinfo', self.ipinfo)
+        return app
+
+    @web.middleware
+    async def middleware(self, request: web.Request, handler):
+        self.requests += 1
+
+        if self.config.latency[1] > 0:
+            await asyncio.sleep(random.uniform(*self.config.latency))
+
+        if random.random() < self.config.error_rate:
+            raise web.HTTPBadGateway()
+
+        if request.path.startswith(API_PREFIX) and not request.path.endswith('/validate-init/v2'):
+            token = request.headers.get('Authorization', '').removeprefix('Bearer ')
+            if token not in self.tokens or random.random() < self.config.unauthorized_rate:
+                raise web.HTTPUnauthorized()
+            if random.random() < self.config.forbidden_rate:
+                raise web.HTTPForbidden()
+            request['account'] = self.accounts[self.tokens[token]]
+
+        return await handler(request)
+
+    async def validate_init(self, request: web.Request) -> web.Response:
+        data = await request.post()
+        user_id = data.get('initData', '')
+
+        account = self.accounts.setdefault(user_id, Account())
+        token = make_token(user_id, self.config.token_ttl)
+        self.tokens[token] = user_id
+
+        return web.json_response({'token': token, 'info': {'level': str(account.level)},
+                                  'levelDescriptions': self.LEVELS})
+
+    async def farming_info(self, request: web.Request) -> web.Response:
+        account = request['account']
+        return web.json_response({
+            'balance': str(account.balance),
+            'activeFarmingStartedAt': isoformat(account.farm_started_at) if account.farm_started_at else None,
+            'farmingDurationInSec': self.config.farming_duration,
+            'farmingReward': 100 * (account.level + 1)
+        })
+
+    async def farming_start(self, request: web.Request) -> web.Response:
+        account = request['account']
+        if account.farm_started_at is not None:
+            raise web.HTTPForbidden()
+
+        account.farm_started_at = tm.time()
+        return web.json_response({})
+
+    async def farming_finish(self, request: web.Request) -> web.Response:
+        account = request['account']
+        if account.farm_started_at is None or tm.time() - account.farm_started_at < self.config.farming_duration:
+            raise web.HTTPForbidden()
+
+        account.farm_started_at = None
+        account.balance += 100 * (account.level + 1)
+        return web.json_response({'balance': str(account.balance)})
+
+    async def level_upgrade(self, request: web.Request) -> web.Response:
+        account = request['account']
+        price = int(self.LEVELS[min(account.level + 1, len(self.LEVELS) - 1)]['price'])
+        if account.level + 1 >= len(self.LEVELS) or account.balance < price:
+            raise web.HTTPForbidden()
+
+        account.level += 1
+        account.balance -= price
+        return web.json_response({'balance': account.balance})
+
+    async def staking_active(self, request: web.Request) -> web.Response:
+        account = request['account']
+        return web.json_response({'stakes': account.stakes, 'stakingInfo': {'options': self.OPTIONS}})
+
+    async def staking(self, request: web.Request) -> web.Response:
+        account = request['account']
+        data = await request.json()
+        amount = int(data['amount'])
+        option = next((option for option in self.OPTIONS if option['id'] == data.get('optionId')), None)
+        if option is None or amount > account.balance:
+            raise web.HTTPForbidden()
+
+        account.balance -= amount
+        account.stakes.append({
+            'id': f"stake-{len(account.stakes) + 1}",
+            'amount': amount,
+            'duration': option['duration'],
+            'percent': option['percent'],
+            'finishAt': isoformat(tm.time() + option['duration'] * 86400)
+        })
+        return web.json_response({'stakes': account.stakes})
+
+    async def staking_claim(self, request: web.Request) -> web.Response:
+        account = request['account']
+        data = await request.json()
+        stake = next((stake for stake in account.stakes if stake['id'] == data.get('id')), None)
+        if stake is None:
+            raise web.HTTPForbidden()
+
+        account.stakes.remove(stake)
+        account.balance += stake['amount'] + stake['amount'] * stake['percent'] // 100
+        return web.json_response({'balance': str(account.balance)})
+
+    async def tasks(self, request: web.Request) -> web.Response:
+        return web.json_response([])
+
+    async def task(self, request: web.Request) -> web.Response:
+        return web.json_response({'id': request.match_info['task_id'], 'submission': {'status': 'COMPLETED'}})
+
+    async def task_ok(self, request: web.Request) -> web.Response:
+        return web.Response(text='OK')
+
+    async def ipinfo(self, request: web.Request) -> web.Response:
+        return web.json_response({'ip': '127.0.0.1', 'city': 'Localhost', 'country': 'ZZ'})
+
+
+async def serve(host: str, port: int, config: MockConfig) -> None:
+    runner = web.AppRunner(MockTimeFarmAPI(config).build_app(), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+def run_server(host: str, port: int, config: MockConfig) -> None:
+    try:
+        asyncio.run(serve(host, port, config))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Local stand-in for the TimeFarm API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, nargs=2, default=(0.0, 0.0), metavar=("MIN", "MAX"))
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--unauthorized-rate", type=float, default=0.0)
+    parser.add_argument("--forbidden-rate", type=float, default=0.0)
+    parser.add_argument("--farming-duration", type=int, default=0)
+    parser.add_argument("--token-ttl", type=int, default=3600)
+    args = parser.parse_args()
+
+    run_server(args.host, args.port, MockConfig(
+        latency=tuple(args.latency),
+        error_rate=args.error_rate,
+        unauthorized_rate=args.unauthorized_rate,
+        forbidden_rate=args.forbidden_rate,
+        farming_duration=args.farming_duration,
+        token_ttl=args.token_ttl
+    ))
@@ -9,6 +9,8 @@ class Settings(BaseSettings):
 
     REF_ID: str = '1jwII9PnSOUKmhnIx'
 
+    API_BASE_URL: str = 'https://tg-bot-tap.laborx.io/api/v1'
+
     USE_RANDOM_DELAY_IN_RUN: bool = False
     RANDOM_DELAY_IN_RUN: list[int] = [3, 29800]
     SLEEP_BETWEEN_CLAIM: tuple[int, int] = (360, 540)
@@ -20,7 +22,50 @@ class Settings(BaseSettings):
 
     SLEEP_TIME: list[int] = [31000, 42000]
 
+    USE_SCHEDULER: bool = True
+    WAKE_UP_DELAY: list[int] = [60, 300]
+    FARM_RETRY_DELAY: list[int] = [300, 900]
+
     USE_PROXY: bool = False
+    PROXY_CHECK_URL: str = 'https://ipinfo.io/json'
+    PROXY_CHECK_TTL: int = 600
+    PROXY_CHECK_TIMEOUT: int = 5
+
+    SESSION_STORE_PATH: str = 'sessions/store.db'
+    SESSION_STORAGE: str = 'files'
+    USER_AGENTS_DIR: str = 'user_agents'
+    TOKEN_TTL: int = 3600
+    STATE_MAX_AGE: int = 300
+    STAKING_OPTIONS_TTL: int = 3600
+    TOKEN_REFRESH_MARGIN: int = 300
+    TOKEN_REFRESH_CONCURRENCY: int = 10
+
+    TG_CLIENTS_LIMIT: int = 50
+    AUTH_CONCURRENCY: int = 5
+    AUTH_RATE_PER_API_ID: float = 1.0
+    AUTH_BURST_PER_API_ID: int = 5
+    AUTH_FLOOD_RETRY: int = 3
+
+    RATE_LIMIT_PER_PROXY: float = 5.0
+    RATE_LIMIT_BURST: int = 10
+
+    REQUEST_RETRY: int = 2
+    CIRCUIT_FAILURE_THRESHOLD: int = 5
+    CIRCUIT_RESET_TIMEOUT: int = 300
+
+    LOG_MODE: str = 'pretty'
+    LOG_AGGREGATE_INTERVAL: int = 60
+
+    METRICS_ENABLED: bool = False
+    METRICS_HOST: str = '127.0.0.1'
+    METRICS_PORT: int = 9108
+
+    TRACE_REQUESTS: bool = False
+    TRACE_FILE: str = 'logs/trace.jsonl'
+
+    POOL_LIMIT_PER_PROXY: int = 20
+    POOL_KEEPALIVE_TIMEOUT: int = 60
+    POOL_IDLE_TIMEOUT: int = 600
 
 
 settings = Settings()
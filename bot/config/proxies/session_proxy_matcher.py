@@ -1,14 +1,48 @@
 import os
+import sys
 import json
+import math
+import heapq
 import re
 import random
+import asyncio
+import argparse
+import statistics
+
+SESSIONS_DIR = 'sessions'
+PROXIES_FILE = 'bot/config/proxies/proxies.txt'
+SESSION_PROXY_FILE = 'bot/config/proxies/session_proxy.json'
+
+
+def get_session_names():
+    return sorted(os.path.splitext(f)[0] for f in os.listdir(SESSIONS_DIR) if f.endswith('.session'))
+
+
+def get_proxies():
+    with open(PROXIES_FILE, 'r') as f:
+        return [proxy.strip() for proxy in f.read().splitlines() if proxy.strip()]
+
+
+def split_proxy_entry(entry):
+    # Запись может быть строкой или списком: основной прокси и запасные
+    if isinstance(entry, list):
+        return (entry[0], entry[1:]) if entry else (None, [])
+    return entry, []
+
+
+def save_session_proxy_map(session_proxy_map):
+    tmp_file = f"{SESSION_PROXY_FILE}.tmp"
+    with open(tmp_file, 'w') as f:
+        json.dump(session_proxy_map, f, indent=4)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, SESSION_PROXY_FILE)
+
 
 def match_sessions_to_proxies():
-    sessions_dir = 'sessions'
-    proxies_file = 'bot/config/proxies/proxies.txt'
-    session_files = [f for f in os.listdir(sessions_dir) if f.endswith('.session')]
+    session_files = [f for f in os.listdir(SESSIONS_DIR) if f.endswith('.session')]
 
-    with open(proxies_file, 'r') as f:
+    with open(PROXIES_FILE, 'r') as f:
         proxies = f.read().splitlines()
 
     session_proxy_map = {}
@@ -27,10 +61,121 @@ def match_sessions_to_proxies():
         else:
             session_proxy_map[session_name] = random.choice(proxies)
 
-    with open('bot/config/proxies/session_proxy.json', 'w') as f:
-        json.dump(session_proxy_map, f, indent=4)
+    save_session_proxy_map(session_proxy_map)
 
     print(f"Matched {len(session_proxy_map)} sessions with proxies.")
 
+
+async def measure_proxies(proxies, probes=3, concurrency=50):
+    from bot.utils.proxy_health import proxy_health
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def measure(proxy):
+        latencies = []
+        async with semaphore:
+            for _ in range(probes):
+                status = await proxy_health.check(proxy, force=True)
+                if status.ok:
+                    latencies.append(status.ttfb)
+
+        return proxy, {
+            'success_rate': len(latencies) / probes,
+            'latency': statistics.median(latencies) if latencies else None
+        }
+
+    return dict(await asyncio.gather(*[measure(proxy) for proxy in proxies]))
+
+
+def assign_sessions(session_names, stats, capacity=None, current=None, min_success_rate=0.5, keep_current=True):
+    # Стоимость прокси: медианная задержка с поправкой на долю успешных проверок
+    cost = {
+        proxy: max(stat['latency'], 0.001) / stat['success_rate']
+        for proxy, stat in stats.items() if stat['success_rate'] >= min_success_rate
+    }
+    healthy = sorted(cost, key=cost.get)
+    if not healthy:
+        raise ValueError("No working proxies found")
+
+    capacity = capacity or math.ceil(len(session_names) / len(healthy))
+    if capacity * len(healthy) < len(session_names):
+        raise ValueError(f"{len(healthy)} working proxies with capacity {capacity} "
+                         f"cannot serve {len(session_names)} sessions")
+
+    current = current or {}
+    load = dict.fromkeys(healthy, 0)
+    session_proxy_map = {}
+    moved = []
+
+    # При ребалансировке сессии на живых прокси остаются на месте
+    if keep_current:
+        for session_name in session_names:
+            proxy, _ = split_proxy_entry(current.get(session_name))
+            if proxy in load and load[proxy] < capacity:
+                session_proxy_map[session_name] = proxy
+                load[proxy] += 1
+
+    # Куча (переполнен, нагрузка × стоимость, ранг): быстрый прокси получает пропорционально больше сессий,
+    # пока не упрётся в capacity; выбор за O(log P)
+    def heap_key(proxy, rank):
+        return load[proxy] >= capacity, (load[proxy] + 1) * cost[proxy], rank, proxy
+
+    heap = [heap_key(proxy, rank) for rank, proxy in enumerate(healthy)]
+    heapq.heapify(heap)
+
+    for session_name in session_names:
+        if session_name in session_proxy_map:
+            continue
+
+        _, _, rank, proxy = heapq.heappop(heap)
+        session_proxy_map[session_name] = proxy
+        load[proxy] += 1
+        heapq.heappush(heap, heap_key(proxy, rank))
+        moved.append(session_name)
+
+    # Запасные прокси, заданные пользователем, сохраняются за сессией
+    for session_name, proxy in session_proxy_map.items():
+        _, fallbacks = split_proxy_entry(current.get(session_name))
+        fallbacks = [fallback for fallback in fallbacks if fallback != proxy]
+        if fallbacks:
+            session_proxy_map[session_name] = [proxy, *fallbacks]
+
+    return session_proxy_map, moved
+
+
+async def match_sessions_balanced(capacity=None, probes=3, rebalance=False):
+    session_names = get_session_names()
+    proxies = get_proxies()
+
+    current = {}
+    if os.path.exists(SESSION_PROXY_FILE):
+        with open(SESSION_PROXY_FILE, 'r') as f:
+            current = json.load(f)
+
+    print(f"Checking {len(proxies)} proxies...")
+    stats = await measure_proxies(proxies, probes=probes)
+    alive = sum(stat['success_rate'] > 0 for stat in stats.values())
+    print(f"{alive}/{len(proxies)} proxies responded.")
+
+    session_proxy_map, moved = assign_sessions(session_names, stats, capacity=capacity, current=current,
+                                               keep_current=rebalance)
+    save_session_proxy_map(session_proxy_map)
+
+    print(f"Matched {len(session_proxy_map)} sessions with proxies, {len(moved)} sessions (re)assigned.")
+
+
 if __name__ == "__main__":
-    match_sessions_to_proxies()
+    parser = argparse.ArgumentParser(description="Match sessions to proxies")
+    parser.add_argument("--balanced", action="store_true",
+                        help="Check every proxy and spread sessions by latency and load")
+    parser.add_argument("--rebalance", action="store_true",
+                        help="With --balanced: keep sessions on healthy proxies and move only the rest")
+    parser.add_argument("--capacity", type=int, default=None, help="Maximum sessions per proxy")
+    parser.add_argument("--probes", type=int, default=3, help="Checks per proxy")
+    args = parser.parse_args()
+
+    if args.balanced or args.rebalance:
+        sys.path.insert(0, os.getcwd())
+        asyncio.run(match_sessions_balanced(capacity=args.capacity, probes=args.probes, rebalance=args.rebalance))
+    else:
+        match_sessions_to_proxies()
@@ -0,0 +1,156 @@
+import orjson
+
+from datetime import datetime
+
+from bot.exceptions import ResponseDecodeError
+
+
+def parse_timestamp(value: str | None) -> float | None:
+    if not value:
+        return None
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+
+
+def to_int(value) -> int:
+    return value if type(value) is int else int(float(value))
+
+
+class LevelDescription:
+    __slots__ = ('level', 'price', 'farm_multiplicator')
+
+    def __init__(self, level: int, price: int, farm_multiplicator):
+        self.level = level
+        self.price = price
+        self.farm_multiplicator = farm_multiplicator
+
+    @classmethod
+    def from_json(cls, data: dict) -> 'LevelDescription':
+        return cls(to_int(data['level']), to_int(data.get('price', 0)), data.get('farmMultiplicator', 1))
+
+    def to_json(self) -> dict:
+        return {'level': self.level, 'price': self.price, 'farmMultiplicator': self.farm_multiplicator}
+
+
+class AuthResponse:
+    """``/auth/validate-init/v2``"""
+
+    __slots__ = ('token', 'level', 'level_descriptions')
+
+    def __init__(self, token: str, level: int, level_descriptions: list[LevelDescription]):
+        self.token = token
+        self.level = level
+        self.level_descriptions = level_descriptions
+
+    @classmethod
+    def from_json(cls, data: dict) -> 'AuthResponse':
+        return cls(
+            data['token'],
+            to_int(data['info']['level']),
+            [LevelDescription.from_json(item) for item in data['levelDescriptions']]
+        )
+
+
+class FarmingInfo:
+    """``/farming/info``"""
+
+    __slots__ = ('balance', 'farming_reward', 'farming_duration', 'farm_started_at')
+
+    def __init__(self, balance: int, farming_reward: int, farming_duration: int, farm_started_at: float | None):
+        self.balance = balance
+        self.farming_reward = farming_reward
+        self.farming_duration = farming_duration
+        self.farm_started_at = farm_started_at
+
+    @classmethod
+    def from_json(cls, data: dict) -> 'FarmingInfo':
+        return cls(
+            to_int(data['balance']),
+            to_int(data.get('farmingReward') or 0),
+            to_int(data.get('farmingDurationInSec') or 0),
+            parse_timestamp(data.get('activeFarmingStartedAt'))
+        )
+
+
+class Stake:
+    __slots__ = ('id', 'amount', 'duration', 'percent', 'finish_at')
+
+    def __init__(self, id: str, amount: int, duration: int, percent, finish_at: float | None):
+        self.id = id
+        self.amount = amount
+        self.duration = duration
+        self.percent = percent
+        self.finish_at = finish_at
+
+    @classmethod
+    def from_json(cls, data: dict) -> 'Stake':
+        return cls(
+            data['id'],
+            to_int(data.get('amount') or 0),
+            to_int(data.get('duration') or 0),
+            data.get('percent', 0),
+            parse_timestamp(data.get('finishAt'))
+        )
+
+
+class StakingOption:
+    __slots__ = ('id', 'duration', 'percent')
+
+    def __init__(self, id: str, duration: int, percent):
+        self.id = id
+        self.duration = duration
+        self.percent = percent
+
+    @classmethod
+    def from_json(cls, data: dict) -> 'StakingOption':
+        return cls(str(data['id']), to_int(data.get('duration') or 0), data.get('percent', 0))
+
+
+class StakingInfo:
+    """``/staking/active``"""
+
+    __slots__ = ('stakes', 'options')
+
+    def __init__(self, stakes: list[Stake], options: list[StakingOption]):
+        self.stakes = stakes
+        self.options = options
+
+    @classmethod
+    def from_json(cls, data: dict) -> 'StakingInfo':
+        return cls(
+            [Stake.from_json(item) for item in data.get('stakes') or []],
+            [StakingOption.from_json(item) for item in (data.get('stakingInfo') or {}).get('options') or []]
+        )
+
+
+class StakingResult:
+    """``/staking``"""
+
+    __slots__ = ('stakes',)
+
+    def __init__(self, stakes: list[Stake]):
+        self.stakes = stakes
+
+    @classmethod
+    def from_json(cls, data: dict) -> 'StakingResult':
+        return cls([Stake.from_json(item) for item in data['stakes']])
+
+
+class BalanceResponse:
+    """``/me/level/upgrade``, ``/farming/finish`` and ``/staking/claim``"""
+
+    __slots__ = ('balance',)
+
+    def __init__(self, balance: int | None):
+        self.balance = balance
+
+    @classmethod
+    def from_json(cls, data: dict) -> 'BalanceResponse':
+        balance = data.get('balance')
+        return cls(to_int(balance) if balance is not None else None)
+
+
+def decode(model, body: bytes):
+    try:
+        return model.from_json(orjson.loads(body))
+    except (orjson.JSONDecodeError, KeyError, TypeError, ValueError, AttributeError) as error:
+        raise ResponseDecodeError(model.__name__, error) from error
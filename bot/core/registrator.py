@@ -5,6 +5,7 @@ from urllib.parse import urlparse
 from pyrogram import Client
 from bot.config import settings
 from bot.utils import logger
+from bot.utils.session_store import session_store
 
 PROXY_FILE_PATH = 'bot/config/proxies/session_proxy.json'
 
@@ -83,6 +84,8 @@ async def register_sessions() -> None:
                     proxy=proxy
             ) as session:
                 user_data = await session.get_me()
+                if settings.SESSION_STORAGE == 'store':
+                    session_store.save_tg_sessions({session_name: await session.export_session_string()})
 
             logger.success(
                 f'Session added successfully <ly>@{user_data.username}</ly> | {user_data.first_name} {user_data.last_name}')
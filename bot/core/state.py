@@ -0,0 +1,76 @@
+import time as tm
+
+from bot.config import settings
+from bot.core.models import FarmingInfo, StakingOption
+
+
+class AccountState:
+    """Snapshot of one account's farming state, kept current across a cycle.
+
+    Populated from ``/farming/info`` once and then patched in place from the
+    ``balance`` returned by mutating endpoints instead of being refetched.
+    """
+
+    __slots__ = ('balance', 'farming_reward', 'farming_duration', 'farm_started_at', 'fetched_at')
+
+    def __init__(self):
+        self.balance = 0
+        self.farming_reward = 0
+        self.farming_duration = 0
+        self.farm_started_at = None
+        self.fetched_at = 0.0
+
+    @property
+    def farming(self) -> bool:
+        return self.farm_started_at is not None
+
+    @property
+    def farm_finish_at(self) -> float | None:
+        if self.farm_started_at is None or not self.farming_duration:
+            return None
+        return self.farm_started_at + self.farming_duration
+
+    def is_fresh(self, max_age: float) -> bool:
+        return tm.time() - self.fetched_at < max_age
+
+    def mark_stale(self) -> None:
+        self.fetched_at = 0.0
+
+    def update_from_farming_info(self, farming_info: FarmingInfo) -> None:
+        self.balance = farming_info.balance
+        self.farming_reward = farming_info.farming_reward
+        self.farming_duration = farming_info.farming_duration
+        self.farm_started_at = farming_info.farm_started_at
+        self.fetched_at = tm.time()
+
+    def restore(self, saved_state: dict) -> None:
+        self.balance = saved_state['balance']
+        self.farming_reward = saved_state['farming_reward']
+        self.farming_duration = saved_state['farming_duration']
+        self.farm_started_at = saved_state['farm_started_at']
+
+    def update_balance(self, balance) -> None:
+        if balance is not None:
+            self.balance = int(float(balance))
+
+
+class StakingOptionsCache:
+    """Process-wide cache of staking options; they are the same for every account."""
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self.options = []
+        self.updated_at = 0.0
+
+    def get(self) -> list[StakingOption] | None:
+        if self.options and tm.time() - self.updated_at < self.ttl:
+            return self.options
+        return None
+
+    def update(self, options: list[StakingOption]) -> None:
+        if options:
+            self.options = options
+            self.updated_at = tm.time()
+
+
+staking_options = StakingOptionsCache(ttl=settings.STAKING_OPTIONS_TTL)
@@ -1,44 +1,89 @@
 import asyncio
-import os
-import json
 import traceback
 import aiohttp
-import aiofiles
 import random
 import time as tm
 
 from datetime import datetime, timezone
-from datetime import datetime, timedelta
-from aiohttp_proxy import ProxyConnector
 from better_proxy import Proxy
-from typing import Tuple, Dict, Any
-from pyrogram import Client
-from pyrogram.errors import Unauthorized, UserDeactivated, AuthKeyUnregistered, FloodWait
-from pyrogram.raw.functions.messages import RequestWebView
-from pyrogram.raw.types import InputBotAppShortName
-from urllib.parse import unquote, parse_qs
+from typing import Tuple, Any, TYPE_CHECKING
+from urllib.parse import unquote, urlsplit
 
 from bot.config import settings
 from bot.core.agents import generate_random_user_agent
-from bot.utils.logger import logger
-from bot.exceptions import InvalidSession
+from bot.utils.logger import logger, set_log_context
+from bot.exceptions import InvalidSession, AuthorizationError, CircuitOpenError, ProxyUnavailable, ResponseDecodeError
 from bot.utils.connection_manager import connection_manager
+from bot.utils.fleet import fleet_state, STARTING, WORKING, SLEEPING, BACKOFF, STOPPED
+from bot.utils.auth_gate import auth_gate
+from bot.utils.metrics import metrics, get_proxy_label
+from bot.utils.client_factory import tg_client_factory
+from bot.utils.proxy_health import proxy_health
+from bot.utils.rate_limiter import rate_limiter
+from bot.utils.retry import classify_error, retry_policy, circuit_breakers, ERROR_DESCRIPTIONS, PROXY
+from bot.utils.scheduler import scheduler
+from bot.utils.session_store import session_store
+from bot.utils.tracing import request_tracer
 from .headers import headers
+from .models import decode, AuthResponse, BalanceResponse, FarmingInfo, LevelDescription, Stake, StakingInfo, StakingResult
+from .state import AccountState, staking_options
+
+if TYPE_CHECKING:
+    from pyrogram import Client
+    from pyrogram.raw.types import InputPeerUser
+
+BOT_USERNAME = 'TimeFarmCryptoBot'
+TOKEN_REFRESH_MIN_INTERVAL = 60
+
+token_refresh_semaphore = asyncio.Semaphore(settings.TOKEN_REFRESH_CONCURRENCY)
 
 
 class Tapper:
-    def __init__(self, tg_client: Client, proxy: str):
-        self.session_name = tg_client.name
-        self.tg_client = tg_client
-        self.proxy = proxy
+    def __init__(self, session_name: str, proxy: str | list[str] | None, saved_state: dict | None = None):
+        self.session_name = session_name
+        self.proxies = [proxy] if isinstance(proxy, str) else list(proxy or [])
+        self.proxy = self.proxies[0] if self.proxies else None
+        self.http_client = None
 
-        self.user_agents_dir = "user_agents"
-        self.session_ug_dict = {}
         self.headers = headers.copy()
 
+        self.state = AccountState()
+        self.stake_finish_at = None
+        self.staking_data = None
+        self.token_expires_at = 0
+        self.level_num = 0
+        self.level_descriptions = []
+        self.failures = 0
+        self._refresh_task = None
+        self._refresh_loop = None
+        self.resume_at = None
+        self.next_wake_up = None
+
+        fleet_state.set_status(self.session_name, STARTING)
+        if saved_state:
+            self.restore_state(saved_state)
+
+    def restore_state(self, saved_state: dict) -> None:
+        self.state.restore(saved_state)
+        self.level_num = saved_state['level']
+        self.stake_finish_at = saved_state['stake_finish_at']
+        self.resume_at = saved_state['next_wake_up']
+
+    def save_state(self, next_wake_up: float | None = None) -> None:
+        try:
+            session_store.save_state(self.session_name, {
+                'balance': self.state.balance,
+                'farming_reward': self.state.farming_reward,
+                'farming_duration': self.state.farming_duration,
+                'farm_started_at': self.state.farm_started_at,
+                'level': self.level_num,
+                'stake_finish_at': self.stake_finish_at,
+                'next_wake_up': next_wake_up
+            })
+        except Exception as error:
+            logger.warning(f"{self.session_name} | Failed to save state: {error}")
+
     async def init(self):
-        os.makedirs(self.user_agents_dir, exist_ok=True)
-        await self.load_user_agents()
         user_agent, sec_ch_ua = await self.check_user_agent()
         self.headers['User-Agent'] = user_agent
         self.headers['Sec-Ch-Ua'] = sec_ch_ua
@@ -47,127 +92,94 @@ class Tapper:
         user_agent, sec_ch_ua = generate_random_user_agent(device_type='android', browser_type='webview')
         return user_agent, sec_ch_ua
 
-    async def load_user_agents(self) -> None:
-        try:
-            os.makedirs(self.user_agents_dir, exist_ok=True)
-            filename = f"{self.session_name}.json"
-            file_path = os.path.join(self.user_agents_dir, filename)
-
-            if not os.path.exists(file_path):
-                logger.info(f"{self.session_name} | User agent file not found. A new one will be created when needed.")
-                return
-
-            try:
-                async with aiofiles.open(file_path, 'r') as user_agent_file:
-                    content = await user_agent_file.read()
-                    if not content.strip():
-                        logger.warning(f"{self.session_name} | User agent file '{filename}' is empty.")
-                        return
-
-                    data = json.loads(content)
-                    if data['session_name'] != self.session_name:
-                        logger.warning(f"{self.session_name} | Session name mismatch in file '{filename}'.")
-                        return
-
-                    self.session_ug_dict = {self.session_name: data}
-            except json.JSONDecodeError:
-                logger.warning(f"{self.session_name} | Invalid JSON in user agent file: {filename}")
-            except Exception as e:
-                logger.error(f"{self.session_name} | Error reading user agent file {filename}: {e}")
-        except Exception as e:
-            logger.error(f"{self.session_name} | Error loading user agents: {e}")
-
     async def save_user_agent(self) -> Tuple[str, str]:
         user_agent_str, sec_ch_ua = await self.generate_random_user_agent()
 
-        new_session_data = {
-            'session_name': self.session_name,
-            'user_agent': user_agent_str,
-            'sec_ch_ua': sec_ch_ua
-        }
-
-        file_path = os.path.join(self.user_agents_dir, f"{self.session_name}.json")
         try:
-            async with aiofiles.open(file_path, 'w') as user_agent_file:
-                await user_agent_file.write(json.dumps(new_session_data, indent=4, ensure_ascii=False))
+            session_store.save_user_agents({self.session_name: (user_agent_str, sec_ch_ua)})
         except Exception as e:
             logger.error(f"{self.session_name} | Error saving user agent data: {e}")
 
-        self.session_ug_dict = {self.session_name: new_session_data}
-
         logger.info(f"{self.session_name} | User agent saved successfully: {user_agent_str}")
 
         return user_agent_str, sec_ch_ua
 
     async def check_user_agent(self) -> Tuple[str, str]:
-        if self.session_name not in self.session_ug_dict:
+        session_data = session_store.get_user_agent(self.session_name)
+        if session_data is None:
             return await self.save_user_agent()
 
-        session_data = self.session_ug_dict[self.session_name]
-        if 'user_agent' not in session_data or 'sec_ch_ua' not in session_data:
-            return await self.save_user_agent()
-
-        return session_data['user_agent'], session_data['sec_ch_ua']
+        return session_data
 
-    async def check_proxy(self, http_client: aiohttp.ClientSession) -> bool:
-        try:
-            response = await http_client.get(url='https://ipinfo.io/json', timeout=aiohttp.ClientTimeout(total=5))
-            data = await response.json()
+    def create_http_client(self) -> aiohttp.ClientSession:
+        return connection_manager.create_session(
+            self.proxy, self.headers, trace_configs=request_tracer.get_trace_configs(self.session_name, self.proxy)
+        )
 
-            ip = data.get('ip')
-            city = data.get('city')
-            country = data.get('country')
+    async def check_proxy(self) -> bool:
+        status = await proxy_health.check(self.proxy)
+        proxy_health.watch(self.proxy)
 
-            logger.info(
-                f"{self.session_name} | Check proxy! Country: <cyan>{country}</cyan> | City: <light-yellow>{city}</light-yellow> | Proxy IP: {ip}")
+        if not status.ok:
+            logger.error(f"{self.session_name} | Proxy error: {status.error}")
+            return False
 
-            return True
+        logger.info(
+            f"{self.session_name} | Check proxy! Country: <cyan>{status.country}</cyan> | City: <light-yellow>{status.city}</light-yellow> | Proxy IP: {status.ip}")
 
-        except Exception as error:
-            logger.error(f"{self.session_name} | Proxy error: {error}")
-            return False
+        return True
 
-    async def get_tg_web_data(self) -> str:
-        if self.proxy:
-            proxy = Proxy.from_str(self.proxy)
-            proxy_dict = dict(
-                scheme=proxy.protocol,
-                hostname=proxy.host,
-                port=proxy.port,
-                username=proxy.login,
-                password=proxy.password
-            )
-        else:
-            proxy_dict = None
+    async def select_proxy(self) -> str | None:
+        # основной прокси в приоритете, затем текущий (sticky), затем остальные по порядку
+        for proxy in dict.fromkeys([self.proxies[0], self.proxy, *self.proxies]):
+            if circuit_breakers.get('proxy', proxy).is_open:
+                continue
 
-        self.tg_client.proxy = proxy_dict
+            # наблюдаемые прокси перепроверяются в фоне, поэтому в цикле статус читается из кэша бесплатно
+            status = proxy_health.get(proxy) or await proxy_health.check(proxy)
+            proxy_health.watch(proxy)
+            if status.ok:
+                return proxy
 
-        try:
-            if not self.tg_client.is_connected:
-                try:
-                    await self.tg_client.connect()
-                except (Unauthorized, UserDeactivated, AuthKeyUnregistered):
-                    raise InvalidSession(self.session_name)
+        return None
 
-            self.refer_id = settings.REF_ID
+    async def ensure_proxy(self) -> None:
+        proxy = await self.select_proxy()
+        if proxy is None:
+            raise ProxyUnavailable(f"none of {len(self.proxies)} proxies is reachable")
 
-            web_view = await self.tg_client.invoke(RequestWebView(
-                peer=await self.tg_client.resolve_peer('TimeFarmCryptoBot'),
-                bot=await self.tg_client.resolve_peer('TimeFarmCryptoBot'),
-                platform='android',
-                from_bot_menu=False,
-                url='https://tg-tap-miniapp.laborx.io/',
-                start_param=self.refer_id
-            ))
+        if proxy == self.proxy and self.http_client is not None:
+            return
 
-            auth_url = web_view.url
-            tg_web_data = unquote(
-                string=auth_url.split('tgWebAppData=', maxsplit=1)[1].split('&tgWebAppVersion', maxsplit=1)[0])
+        if self.http_client is not None:
+            logger.warning(f"{self.session_name} | Switching proxy "
+                           f"{'back to primary' if proxy == self.proxies[0] else f'to fallback #{self.proxies.index(proxy)}'}")
+            await connection_manager.close_session(self.http_client, self.proxy)
+            if self._refresh_loop is not None:
+                self._refresh_loop.cancel()
+                self._refresh_loop = None
 
-            if self.tg_client.is_connected:
-                await self.tg_client.disconnect()
+        self.proxy = proxy
+        set_log_context(proxy=get_proxy_label(self.proxy))
+        self.http_client = self.create_http_client()
+        await self.check_proxy()
+
+    def get_tg_proxy(self) -> dict | None:
+        if not self.proxy:
+            return None
+
+        proxy = Proxy.from_str(self.proxy)
+        return dict(
+            scheme=proxy.protocol,
+            hostname=proxy.host,
+            port=proxy.port,
+            username=proxy.login,
+            password=proxy.password
+        )
 
-            return tg_web_data
+    async def get_tg_web_data(self) -> str:
+        try:
+            return await auth_gate.call(self.session_name, settings.API_ID, self.request_web_view)
 
         except InvalidSession as error:
             raise error
@@ -175,42 +187,209 @@ class Tapper:
         except Exception as error:
             logger.error(f"{self.session_name} | Unknown error during Authorization: {error}")
             await asyncio.sleep(delay=3)
+            raise AuthorizationError(self.session_name) from error
+
+    async def resolve_bot_peer(self, tg_client: 'Client') -> 'InputPeerUser':
+        from pyrogram.raw.types import InputPeerUser
+
+        cached = session_store.get_peer(self.session_name, BOT_USERNAME)
+        if cached:
+            return InputPeerUser(user_id=cached[0], access_hash=cached[1])
+
+        peer = await tg_client.resolve_peer(BOT_USERNAME)
+        if isinstance(peer, InputPeerUser):
+            session_store.save_peer(self.session_name, BOT_USERNAME, peer.user_id, peer.access_hash)
+
+        return peer
+
+    async def invoke_web_view(self, tg_client: 'Client'):
+        from pyrogram.errors import PeerIdInvalid
+        from pyrogram.raw.functions.messages import RequestWebView
+
+        for attempt in range(2):
+            peer = await self.resolve_bot_peer(tg_client)
+            try:
+                return await tg_client.invoke(RequestWebView(
+                    peer=peer,
+                    bot=peer,
+                    platform='android',
+                    from_bot_menu=False,
+                    url='https://tg-tap-miniapp.laborx.io/',
+                    start_param=self.refer_id
+                ))
+            except PeerIdInvalid:
+                session_store.delete_peer(self.session_name, BOT_USERNAME)
+                if attempt:
+                    raise
+
+    async def request_web_view(self) -> str:
+        # pyrogram импортируется лениво: после перезапуска токен обычно берётся из кэша и клиент не нужен
+        from pyrogram.errors import Unauthorized, UserDeactivated, AuthKeyUnregistered
+
+        # Клиент живёт только на время получения tgWebAppData, после выхода из lease он отключается
+        async with tg_client_factory.lease(self.session_name, proxy=self.get_tg_proxy()) as tg_client:
+            if not tg_client.is_connected:
+                try:
+                    await tg_client.connect()
+                except (Unauthorized, UserDeactivated, AuthKeyUnregistered):
+                    raise InvalidSession(self.session_name)
+
+            self.refer_id = settings.REF_ID
+
+            web_view = await self.invoke_web_view(tg_client)
+
+            auth_url = web_view.url
+            return unquote(
+                string=auth_url.split('tgWebAppData=', maxsplit=1)[1].split('&tgWebAppVersion', maxsplit=1)[0])
 
     async def login(self, http_client: aiohttp.ClientSession, tg_web_data: dict[str]) -> dict[str]:
         try:
-            response = await http_client.post(url='https://tg-bot-tap.laborx.io/api/v1/auth/validate-init/v2', data={"initData":tg_web_data,"platform":"android"})
+            await rate_limiter.acquire(settings.API_BASE_URL, self.proxy)
+            started = tm.perf_counter()
+            response = await http_client.post(url=f'{settings.API_BASE_URL}/auth/validate-init/v2', data={"initData":tg_web_data,"platform":"android"})
+            metrics.record_request(str(response.url), self.proxy, response.status, tm.perf_counter() - started)
             response.raise_for_status()
 
-            response_json = await response.json()
+            auth = await self.decode_response(response, AuthResponse)
 
-            json_data = {
-                'token': response_json['token'],
-                'level': response_json['info']['level'],
-                'levelDescriptions': response_json['levelDescriptions']
+            return {
+                'token': auth.token,
+                'level': auth.level,
+                'levelDescriptions': [level_data.to_json() for level_data in auth.level_descriptions]
             }
 
-            return json_data
-
+        except ResponseDecodeError:
+            raise
         except Exception as error:
+            # в метриках ошибка учитывается один раз, как AuthorizationError в run_cycles
             logger.error(f"{self.session_name} | Unknown error while getting Access Token: {error}")
             await asyncio.sleep(delay=3)
 
-    async def get_mining_data(self, http_client: aiohttp.ClientSession) -> dict[str]:
-        try:
-            response = await http_client.get('https://tg-bot-tap.laborx.io/api/v1/farming/info')
-            response.raise_for_status()
+    async def authorize(self, http_client: aiohttp.ClientSession, force: bool = False) -> dict:
+        login_data = None if force else session_store.get_token(self.session_name)
 
-            response_json = await response.json()
+        if login_data and login_data['expires_at'] - settings.TOKEN_REFRESH_MARGIN > tm.time():
+            # уровень в кэше токена мог устареть относительно сохранённого состояния
+            login_data['level'] = max(int(login_data.get('level', 0)), self.level_num)
+            logger.bind(event='token_restored').info(f"{self.session_name} | Access token restored from cache")
+        else:
+            tg_web_data = await self.get_tg_web_data()
+            login_data = await self.login(http_client=http_client, tg_web_data=tg_web_data)
+            if not login_data:
+                raise AuthorizationError(self.session_name)
+            login_data = session_store.save_token(self.session_name, login_data)
+            logger.info(f"{self.session_name} | Logged in successfully!")
+
+        http_client.headers["Authorization"] = f"Bearer {login_data['token']}"
+        self.headers["Authorization"] = f"Bearer {login_data['token']}"
+        self.token_expires_at = login_data['expires_at'] - settings.TOKEN_REFRESH_MARGIN
+        self.level_num = int(login_data.get('level', 0))
+        self.level_descriptions = [LevelDescription.from_json(item) for item in login_data.get('levelDescriptions', [])]
+
+        return login_data
+
+    async def refresh_token(self, http_client: aiohttp.ClientSession, force: bool = False) -> None:
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh_token(http_client, force))
+
+        await asyncio.shield(self._refresh_task)
+
+    async def _refresh_token(self, http_client: aiohttp.ClientSession, force: bool) -> None:
+        async with token_refresh_semaphore:
+            await self.authorize(http_client=http_client, force=force)
+
+    def is_sleeping(self) -> bool:
+        return self.next_wake_up is not None and self.next_wake_up > tm.time()
+
+    def get_token_refresh_at(self) -> float:
+        if self.is_sleeping() and self.token_expires_at < self.next_wake_up:
+            # Токен истечёт во время сна: обновляем его один раз незадолго до пробуждения,
+            # чтобы цикл начался с рабочим токеном
+            return self.next_wake_up - settings.TOKEN_REFRESH_MARGIN
+        return self.token_expires_at
+
+    async def token_refresh_loop(self, http_client: aiohttp.ClientSession) -> None:
+        while True:
+            delay = self.get_token_refresh_at() - tm.time()
+            if delay > 0:
+                await asyncio.sleep(max(delay, TOKEN_REFRESH_MIN_INTERVAL))
+                continue
 
-            return response_json
-        except Exception as error:
-            logger.error(f"{self.session_name} | Unknown error when getting Profile Data: {error}")
-            await asyncio.sleep(delay=3)
+            try:
+                await self.refresh_token(http_client, force=True)
+            except InvalidSession:
+                raise
+            except Exception as error:
+                logger.error(f"{self.session_name} | Background token refresh failed: {error}")
+                await asyncio.sleep(random.randint(60, 180))
+                continue
+
+            await asyncio.sleep(TOKEN_REFRESH_MIN_INTERVAL)
+
+    def handle_unauthorized(self) -> None:
+        session_store.expire_token(self.session_name)
+        self.token_expires_at = 0
+
+    async def _request(self, http_client: aiohttp.ClientSession, method: str, url: str, **kwargs) -> aiohttp.ClientResponse:
+        host = urlsplit(url).hostname
+        attempt = 0
+
+        while True:
+            circuit_breakers.check(host, self.proxy)
+            await rate_limiter.acquire(url, self.proxy)
+
+            started = tm.perf_counter()
+            try:
+                response = await http_client.request(method, url, **kwargs)
+                metrics.record_request(url, self.proxy, response.status, tm.perf_counter() - started)
+
+                if response.status == 401:
+                    response.release()
+                    logger.warning(f"{self.session_name} | Access token rejected, refreshing")
+                    self.handle_unauthorized()
+                    await self.refresh_token(http_client, force=True)
+                    await rate_limiter.acquire(url, self.proxy)
+                    started = tm.perf_counter()
+                    response = await http_client.request(method, url, **kwargs)
+                    metrics.record_request(url, self.proxy, response.status, tm.perf_counter() - started)
+
+                response.raise_for_status()
+
+            except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+                error_class = classify_error(error, self.proxy)
+                circuit_breakers.record(host, self.proxy, error_class)
+                if not isinstance(error, aiohttp.ClientResponseError):
+                    metrics.record_request(url, self.proxy, error_class, tm.perf_counter() - started)
+
+                # повторяем только идемпотентные запросы
+                if method != 'GET' or not retry_policy.is_retryable(error_class) or attempt >= settings.REQUEST_RETRY:
+                    raise
+
+                attempt += 1
+                await asyncio.sleep(retry_policy.get_request_delay(attempt))
+                continue
+
+            circuit_breakers.record(host, self.proxy, None)
+            return response
+
+    async def decode_response(self, response: aiohttp.ClientResponse, model):
+        return decode(model, await response.read())
+
+    async def get_mining_data(self, http_client: aiohttp.ClientSession) -> FarmingInfo:
+        response = await self._request(http_client, 'GET', f'{settings.API_BASE_URL}/farming/info')
+
+        return await self.decode_response(response, FarmingInfo)
+
+    async def refresh_state(self, http_client: aiohttp.ClientSession, force: bool = False) -> AccountState:
+        if force or not self.state.is_fresh(settings.STATE_MAX_AGE):
+            farming_info = await self.get_mining_data(http_client=http_client)
+            self.state.update_from_farming_info(farming_info)
+
+        return self.state
 
     async def get_tasks_list(self, http_client: aiohttp.ClientSession) -> dict[str]:
         try:
-            response = await http_client.get('https://tg-bot-tap.laborx.io/api/v1/tasks')
-            response.raise_for_status()
+            response = await self._request(http_client, 'GET', f'{settings.API_BASE_URL}/tasks')
 
             response_json = await response.json()
 
@@ -221,8 +400,7 @@ class Tapper:
 
     async def get_task_data(self, http_client: aiohttp.ClientSession, task_id: str) -> dict[str]:
         try:
-            response = await http_client.get(f'https://tg-bot-tap.laborx.io/api/v1/tasks/{task_id}')
-            response.raise_for_status()
+            response = await self._request(http_client, 'GET', f'{settings.API_BASE_URL}/tasks/{task_id}')
 
             response_json = await response.json()
 
@@ -231,23 +409,21 @@ class Tapper:
             logger.error(f"{self.session_name} | Unknown error when getting Task Data: {error}")
             await asyncio.sleep(delay=3)
 
-    async def upgrade_level(self, http_client: aiohttp.ClientSession) -> dict[str]:
+    async def upgrade_level(self, http_client: aiohttp.ClientSession) -> BalanceResponse:
         try:
-            response = await http_client.post(url=f'https://tg-bot-tap.laborx.io/api/v1/me/level/upgrade', json={})
-            response.raise_for_status()
+            response = await self._request(http_client, 'POST', url=f'{settings.API_BASE_URL}/me/level/upgrade', json={})
 
-            response_json = await response.json()
-
-            return response_json
+            return await self.decode_response(response, BalanceResponse)
 
+        except ResponseDecodeError:
+            raise
         except Exception as error:
             logger.error(f"{self.session_name} | Unknown error while Upgrade Level: {error}")
             await asyncio.sleep(delay=3)
 
     async def task_claim(self, http_client: aiohttp.ClientSession, task_id: str) -> str:
         try:
-            response = await http_client.post(url=f'https://tg-bot-tap.laborx.io/api/v1/tasks/{task_id}/claims', json={})
-            response.raise_for_status()
+            response = await self._request(http_client, 'POST', url=f'{settings.API_BASE_URL}/tasks/{task_id}/claims', json={})
 
             return response.text
 
@@ -257,8 +433,7 @@ class Tapper:
 
     async def task_submiss(self, http_client: aiohttp.ClientSession, task_id: str) -> str:
         try:
-            response = await http_client.post(url=f'https://tg-bot-tap.laborx.io/api/v1/tasks/{task_id}/submissions', json={})
-            response.raise_for_status()
+            response = await self._request(http_client, 'POST', url=f'{settings.API_BASE_URL}/tasks/{task_id}/submissions', json={})
 
             return response.text
 
@@ -266,66 +441,62 @@ class Tapper:
             #logger.error(f"{self.session_name} | Unknown error while submissions task: {error}")
             await asyncio.sleep(delay=3)
 
+    # Остальные ошибки (5xx, таймауты, открытый circuit) уходят в run_cycles, где к ним применяется backoff
     async def start_mine(self, http_client: aiohttp.ClientSession) -> dict[str, bool | int] | dict[str, bool | Any]:
         try:
-            response = await http_client.post('https://tg-bot-tap.laborx.io/api/v1/farming/start', json={})
-            response.raise_for_status()
-
-            if response.status == 200:
-                return {
-                    'ok': True,
-                    'code': 200
-                }
-
-        except Exception as error:
-            logger.error(f"{self.session_name} | Unknown error when start miner: {error}")
-            await asyncio.sleep(delay=3)
-
+            response = await self._request(http_client, 'POST', f'{settings.API_BASE_URL}/farming/start', json={})
+        except aiohttp.ClientResponseError as error:
+            if error.status != 403:
+                raise
+            logger.warning(f"{self.session_name} | Mine start rejected: {error.status}")
             return {
-                    'ok': True,
-                    'code': response.status
-                }
+                'ok': False,
+                'code': error.status
+            }
+
+        return {
+            'ok': True,
+            'code': response.status
+        }
 
     async def finish_mine(self, http_client: aiohttp.ClientSession) -> dict[str, bool | int] | dict[str, bool | Any]:
         try:
-            response = await http_client.post('https://tg-bot-tap.laborx.io/api/v1/farming/finish', json={})
-            response.raise_for_status()
-
-            response_json = await response.json()
+            response = await self._request(http_client, 'POST', f'{settings.API_BASE_URL}/farming/finish', json={})
+        except aiohttp.ClientResponseError as error:
+            if error.status != 403:
+                raise
+            logger.warning(f"{self.session_name} | Claim rejected: {error.status}")
+            return {
+                'ok': False,
+                'code': error.status
+            }
 
-            if response.status == 200:
-                return {
-                    'ok': True,
-                    'code': 200,
-                    'balance': int(response_json['balance'])
-                }
+        finish_data = await self.decode_response(response, BalanceResponse)
 
-        except Exception as error:
-            #logger.error(f"{self.session_name} | Unknown error when Claiming: {error}")
-            await asyncio.sleep(delay=3)
-
-            return {
-                    'ok': True,
-                    'code': response.status
-                }
+        return {
+            'ok': True,
+            'code': response.status,
+            'balance': finish_data.balance
+        }
 
     async def claim_staking(self, http_client: aiohttp.ClientSession, stake_id: str) -> None:
         try:
-            response = await http_client.post(
-                'https://tg-bot-tap.laborx.io/api/v1/staking/claim',
+            response = await self._request(
+                http_client, 'POST',
+                f'{settings.API_BASE_URL}/staking/claim',
                 json={'id': stake_id}
             )
-            response.raise_for_status()
 
             if response.status == 200:
-                balance_data = await response.json()
-                # logger.debug(f"{self.session_name} | Response: {json.dumps(response, indent=4)}")
-                new_balance = balance_data.get('balance')
+                new_balance = (await self.decode_response(response, BalanceResponse)).balance
 
                 if new_balance is not None:
+                    self.state.update_balance(new_balance)
+                    if self.staking_data is not None:
+                        self.staking_data.stakes = [stake for stake in self.staking_data.stakes if stake.id != stake_id]
                     logger.success(
                         f"{self.session_name} | Successfully claimed staking reward for stake ID: <y>{stake_id}</y>")
-                    logger.info(f"{self.session_name} | New balance: <c>{int(float(new_balance)):,}</c>")
+                    logger.info(f"{self.session_name} | New balance: <c>{new_balance:,}</c>")
                     await asyncio.sleep(random.randint(10, 30))
                     if random.random() < 0.5:
                         await self.perform_staking(http_client)
@@ -337,24 +508,39 @@ class Tapper:
 
         except aiohttp.ClientResponseError as e:
             logger.error(f"{self.session_name} | HTTP error while claiming staking reward: {e.status}: {str(e)}")
-        except json.JSONDecodeError:
-            logger.error(f"{self.session_name} | Failed to parse JSON response from staking claim")
+        except ResponseDecodeError:
+            raise
         except Exception as error:
             logger.exception(f"{self.session_name} | Unexpected error claiming staking reward: {error}")
 
+    def update_stake_deadline(self, stakes: list[Stake]) -> None:
+        finish_times = [stake.finish_at for stake in stakes if stake.finish_at is not None]
+        self.stake_finish_at = min(finish_times) if finish_times else None
+
+    async def get_staking_data(self, http_client: aiohttp.ClientSession) -> StakingInfo:
+        if self.staking_data is None:
+            response = await self._request(http_client, 'GET', f'{settings.API_BASE_URL}/staking/active')
+            self.staking_data = await self.decode_response(response, StakingInfo)
+            staking_options.update(self.staking_data.options)
+
+        return self.staking_data
+
     async def get_current_staking(self, http_client: aiohttp.ClientSession) -> None:
         try:
-            response = await http_client.get('https://tg-bot-tap.laborx.io/api/v1/staking/active')
-            response.raise_for_status()
-            staking_data = await response.json()
-
-            if 'stakes' in staking_data and staking_data['stakes']:
-                for stake in staking_data['stakes']:
-                    stake_id = stake.get('id')
-                    amount = stake.get('amount', 0)
-                    duration = stake.get('duration', 0)
-                    percent = stake.get('percent', 0)
-                    finish_at = datetime.fromisoformat(stake.get('finishAt', '').replace('Z', '+00:00'))
+            staking_data = await self.get_staking_data(http_client)
+
+            self.update_stake_deadline(staking_data.stakes)
+
+            if staking_data.stakes:
+                for stake in list(staking_data.stakes):
+                    if stake not in self.staking_data.stakes or stake.finish_at is None:
+                        continue
+
+                    stake_id = stake.id
+                    amount = stake.amount
+                    duration = stake.duration
+                    percent = stake.percent
+                    finish_at = datetime.fromtimestamp(stake.finish_at, timezone.utc)
                     formatted_finish_at = finish_at.strftime('%d/%m/%Y %H:%M %Z')
 
                     logger.info(
@@ -380,27 +566,29 @@ class Tapper:
                         time_left = finish_at - current_time
                         # logger.info(f"{self.session_name} | Time left until staking can be claimed: {time_left}")
             else:
-                logger.info(f"{self.session_name} | No active staking found")
+                logger.bind(event='no_stake').info(f"{self.session_name} | No active staking found")
 
+        except ResponseDecodeError:
+            raise
         except Exception as error:
             logger.error(f"{self.session_name} | Error getting current staking info: {error}")
 
     async def perform_staking(self, http_client: aiohttp.ClientSession) -> None:
         try:
-            mining_data = await self.get_mining_data(http_client=http_client)
-            balance = int(float(mining_data.get('balance', 0)))
+            state = await self.refresh_state(http_client=http_client)
+            balance = state.balance
 
             if balance < 10000000:
-                logger.info(f"{self.session_name} | Balance is less than 10,000,000, skipping staking")
+                logger.bind(event='skip_staking').info(f"{self.session_name} | Balance is less than 10,000,000, skipping staking")
                 await self.get_current_staking(http_client)
                 return
 
-            staking_response = await http_client.get('https://tg-bot-tap.laborx.io/api/v1/staking/active')
-            staking_response.raise_for_status()
-            staking_data = await staking_response.json()
+            options = staking_options.get()
+            if options is None:
+                staking_data = await self.get_staking_data(http_client)
+                options = staking_data.options
 
-            staking_options = staking_data.get('stakingInfo', {}).get('options', [])
-            if not staking_options:
+            if not options:
                 logger.error(f"{self.session_name} | No staking options available")
                 await self.get_current_staking(http_client)
                 return
@@ -427,19 +615,23 @@ class Tapper:
             option_weights = [100, 0, 0]
             option_id = random.choices(['1', '2', '3'], weights=option_weights)[0]
 
-            staking_response = await http_client.post(
-                'https://tg-bot-tap.laborx.io/api/v1/staking',
+            staking_response = await self._request(
+                http_client, 'POST',
+                f'{settings.API_BASE_URL}/staking',
                 json={'amount': amount, 'optionId': option_id}
             )
-            staking_response.raise_for_status()
-            staking_result = await staking_response.json()
-
-            if 'stakes' in staking_result:
-                stake = staking_result['stakes'][0]
-                duration = stake['duration']
-                percent = stake['percent']
-                finish_at = datetime.fromisoformat(stake['finishAt'].replace('Z', '+00:00'))
-                formatted_finish_at = finish_at.strftime('%d/%m/%Y %H:%M')
+            staking_result = await self.decode_response(staking_response, StakingResult)
+
+            if staking_result.stakes:
+                state.update_balance(state.balance - amount)
+                if self.staking_data is not None:
+                    self.staking_data.stakes = staking_result.stakes
+                self.update_stake_deadline(staking_result.stakes)
+                stake = staking_result.stakes[0]
+                duration = stake.duration
+                percent = stake.percent
+                formatted_finish_at = (datetime.fromtimestamp(stake.finish_at, timezone.utc).strftime('%d/%m/%Y %H:%M')
+                                       if stake.finish_at is not None else 'unknown')
 
                 logger.success(
                     f"{self.session_name} | Successfully staking | "
@@ -449,9 +641,11 @@ class Tapper:
                     f"Finish at: <lr>{formatted_finish_at}</lr>"
                 )
             else:
-                logger.error(f"{self.session_name} | Staking failed: {staking_result}")
+                logger.error(f"{self.session_name} | Staking failed: no stakes in response")
 
 
+        except ResponseDecodeError:
+            raise
         except Exception as error:
             logger.error(f"{self.session_name} | Error during staking: {error}")
             await asyncio.sleep(delay=3)
@@ -459,253 +653,257 @@ class Tapper:
 
             await self.get_current_staking(http_client)
 
-    async def run(self) -> None:
-        if settings.USE_RANDOM_DELAY_IN_RUN:
-            random_delay = random.randint(settings.RANDOM_DELAY_IN_RUN[0], settings.RANDOM_DELAY_IN_RUN[1])
-            logger.info(
-                f"{self.session_name} | The Bot will go live in <y>{random_delay}s</y>")
-            await asyncio.sleep(random_delay)
-
-        await self.init()
-        access_token_created_time = 0
-        available = False
-
-        proxy_conn = ProxyConnector().from_url(self.proxy) if self.proxy else None
-        http_client = aiohttp.ClientSession(headers=self.headers, connector=proxy_conn)
-        connection_manager.add(http_client)
-
-        if settings.USE_PROXY:
-            if not self.proxy:
-                logger.error(f"{self.session_name} | Proxy is not set. Aborting operation.")
-                return
-            if not await self.check_proxy(http_client):
-                logger.error(f"{self.session_name} | Proxy check failed. Aborting operation.")
-                return
-                
-        while True:
-            try:
-                if http_client.closed:
-                    if proxy_conn:
-                        if not proxy_conn.closed:
-                            await proxy_conn.close()
-
-                    proxy_conn = ProxyConnector().from_url(self.proxy) if self.proxy else None
-                    http_client = aiohttp.ClientSession(headers=self.headers, connector=proxy_conn)
-                    connection_manager.add(http_client)
-
-
-                if tm.time() - access_token_created_time >= 3600:
-                    tg_web_data = await self.get_tg_web_data()
-                    login_data = await self.login(http_client=http_client, tg_web_data=tg_web_data)
-                    logger.info(f"{self.session_name} | Logged in successfully!")
-
-                    http_client.headers["Authorization"] = f"Bearer {login_data['token']}"
-                    self.headers["Authorization"] = f"Bearer {login_data['token']}"
-
-                    level_num = int(login_data.get('level', 0))
-                    levelDescriptions = login_data.get('levelDescriptions', [])
+    def get_next_wake_up(self) -> float:
+        now = tm.time()
+        fallback = now + random.randint(settings.SLEEP_TIME[0], settings.SLEEP_TIME[1])
 
-                    access_token_created_time = tm.time()
+        if not settings.USE_SCHEDULER:
+            return fallback
 
-                    # tasks_data = await self.get_tasks_list(http_client=http_client)
+        farm_finish_at = self.state.farm_finish_at
+        if farm_finish_at is None or farm_finish_at <= now:
+            # ферма не запущена или награда не забрана: пробуем снова скоро, а не через SLEEP_TIME
+            return now + random.randint(settings.FARM_RETRY_DELAY[0], settings.FARM_RETRY_DELAY[1])
 
-                    # for task in tasks_data:
-                    #     task_id = task.get("id")
-                    #     task_title = task.get("title", "Unknown")
-                    #     task_type = task.get("type")
-                    #     if "submission" in task:
-                    #         status = task["submission"].get("status")
-                    #         if status == "CLAIMED":
-                    #             continue
+        deadlines = [deadline for deadline in (self.state.farm_finish_at, self.stake_finish_at) if deadline and deadline > now]
+        if not deadlines:
+            return fallback
 
-                    #         if status == "COMPLETED":
-                    #             task_data_claim = await self.task_claim(http_client=http_client, task_id=task_id)
-                    #             if task_data_claim == "OK":
-                    #                 logger.success(f"{self.session_name} | Successful claim | "
-                    #                                f"Task Title: <g>{task_title}</g>")
-                    #                 continue
+        wake_up_at = min(deadlines) + random.randint(settings.WAKE_UP_DELAY[0], settings.WAKE_UP_DELAY[1])
+        return min(wake_up_at, fallback)
 
-                    #     if task_type == "TELEGRAM":
-                    #         continue
-
-                    #     task_data_submiss = await self.task_submiss(http_client=http_client, task_id=task_id)
-                    #     if task_data_submiss != "OK":
-                    #         continue
-
-                    #     task_data_x = await self.get_task_data(http_client=http_client, task_id=task_id)
-                    #     status = task_data_x.get("submission", {}).get("status")
-                    #     if status != "COMPLETED":
-                    #         logger.error(f"{self.session_name} | Task is not completed: {task_title}")
-                    #         continue
-
-                    #     task_data_claim_x = await self.task_claim(http_client=http_client, task_id=task_id)
-                    #     if task_data_claim_x == "OK":
-                    #         logger.success(f"{self.session_name} | Successful claim | "
-                    #                        f"Task Title: <g>{task_title}</g>")
-                    #         continue
-
-                mining_data = await self.get_mining_data(http_client=http_client)
-
-                try:
-                    balance = int(float(mining_data.get('balance', 0)))
-                    farmingReward = int(mining_data.get('farmingReward', 0))
-                    farmingDurationInSec = int(mining_data.get('farmingDurationInSec', 0))
-                except (KeyError, ValueError) as e:
-                    logger.error(f"{self.session_name} | Error processing mining data: {e}")
-                    balance = 0
-                    farmingReward = 0
-                    farmingDurationInSec = 0
+    async def run(self) -> None:
+        set_log_context(session=self.session_name, proxy=get_proxy_label(self.proxy))
 
-                available = mining_data.get('activeFarmingStartedAt') is not None
+        resuming = self.resume_at is not None and self.resume_at > tm.time()
+        if settings.USE_RANDOM_DELAY_IN_RUN and not resuming:
+            random_delay = random.randint(settings.RANDOM_DELAY_IN_RUN[0], settings.RANDOM_DELAY_IN_RUN[1])
+            logger.info(
+                f"{self.session_name} | The Bot will go live in <y>{random_delay}s</y>")
+            await asyncio.sleep(random_delay)
 
-                if farmingDurationInSec > 0:
-                    settings.SLEEP_BETWEEN_CLAIM = int(farmingDurationInSec / 60)
+        await self.init()
 
-                logger.info(f"{self.session_name} | Balance: <c>{balance:,}</c> | "
-                            f"Earning: <e>{available}</e> | "
-                            f"Speed: <g>x{(level_num + 1)}</g>")
+        try:
+            await self.run_cycles()
+        finally:
+            if self._refresh_loop is not None:
+                self._refresh_loop.cancel()
+            if self.http_client is not None:
+                await connection_manager.close_session(self.http_client, self.proxy)
+
+    async def process_cycle(self, http_client: aiohttp.ClientSession) -> None:
+        # обычно токен уже обновлён token_refresh_loop перед пробуждением, здесь только запасной вариант
+        if tm.time() >= self.token_expires_at:
+            await self.refresh_token(http_client)
+
+        if self._refresh_loop is None or self._refresh_loop.done():
+            self._refresh_loop = asyncio.create_task(self.token_refresh_loop(http_client))
+
+        level_num = self.level_num
+        levelDescriptions = self.level_descriptions
+
+            # tasks_data = await self.get_tasks_list(http_client=http_client)
+
+            # for task in tasks_data:
+            #     task_id = task.get("id")
+            #     task_title = task.get("title", "Unknown")
+            #     task_type = task.get("type")
+            #     if "submission" in task:
+            #         status = task["submission"].get("status")
+            #         if status == "CLAIMED":
+            #             continue
+
+            #         if status == "COMPLETED":
+            #             task_data_claim = await self.task_claim(http_client=http_client, task_id=task_id)
+            #             if task_data_claim == "OK":
+            #                 logger.success(f"{self.session_name} | Successful claim | "
+            #                                f"Task Title: <g>{task_title}</g>")
+            #                 continue
+
+            #     if task_type == "TELEGRAM":
+            #         continue
+
+            #     task_data_submiss = await self.task_submiss(http_client=http_client, task_id=task_id)
+            #     if task_data_submiss != "OK":
+            #         continue
+
+            #     task_data_x = await self.get_task_data(http_client=http_client, task_id=task_id)
+            #     status = task_data_x.get("submission", {}).get("status")
+            #     if status != "COMPLETED":
+            #         logger.error(f"{self.session_name} | Task is not completed: {task_title}")
+            #         continue
+
+            #     task_data_claim_x = await self.task_claim(http_client=http_client, task_id=task_id)
+            #     if task_data_claim_x == "OK":
+            #         logger.success(f"{self.session_name} | Successful claim | "
+            #                        f"Task Title: <g>{task_title}</g>")
+            #         continue
+
+        state = await self.refresh_state(http_client=http_client, force=True)
+        self.staking_data = None
+
+        balance = state.balance
+        farmingReward = state.farming_reward
+        farmingDurationInSec = state.farming_duration
+
+        available = state.farming
+
+        if farmingDurationInSec > 0:
+            settings.SLEEP_BETWEEN_CLAIM = int(farmingDurationInSec / 60)
+
+        logger.bind(event='balance').info(f"{self.session_name} | Balance: <c>{balance:,}</c> | "
+                    f"Earning: <e>{available}</e> | "
+                    f"Speed: <g>x{(level_num + 1)}</g>")
+
+        if not available:
+            status_start = await self.start_mine(http_client=http_client)
+            if status_start.get('ok') and status_start.get('code') == 200:
+                state.farm_started_at = tm.time()
+                logger.bind(event='mine_started').success(f"{self.session_name} | Successful Mine Started | "
+                               f"Balance: <c>{balance:,}</c> | "
+                               f"Speed: Farming (<g>x{(level_num + 1)}</g>)")
+
+        if available:
+            retry = 1
+            while retry <= settings.CLAIM_RETRY:
+                status = await self.finish_mine(http_client=http_client)
+                if status.get('ok') and status.get('code') == 200:
+                    state.farm_started_at = None
+                    state.update_balance(status.get('balance'))
+                    new_balance = balance = state.balance
 
-                if not available:
                     status_start = await self.start_mine(http_client=http_client)
                     if status_start.get('ok') and status_start.get('code') == 200:
-                        logger.success(f"{self.session_name} | Successful Mine Started | "
-                                       f"Balance: <c>{balance:,}</c> | "
-                                       f"Speed: Farming (<g>x{(level_num + 1)}</g>)")
-
-                if available:
-                    retry = 1
-                    while retry <= settings.CLAIM_RETRY:
-                        status = await self.finish_mine(http_client=http_client)
-                        if status.get('ok') and status.get('code') == 200:
-                            mining_data = await self.get_mining_data(http_client=http_client)
-                            new_balance = int(float(mining_data.get('balance', 0)))
-                            balance = new_balance
-
-                            if new_balance == int(status.get('balance', 0)):
-                                status_start = await self.start_mine(http_client=http_client)
-                                if status_start.get('ok') and status_start.get('code') == 200:
-                                    logger.success(f"{self.session_name} | Successful claim | "
-                                                   f"Balance: <c>{new_balance:,}</c> (<g>+{farmingReward}</g>)")
-                                    break
-                        elif status.get('code') == 403:
-                            break
-
-                        if retry < settings.CLAIM_RETRY:
-                            retry_delay = random.uniform(1, 5)
-                            logger.info(
-                                f"{self.session_name} | Retry <y>{retry}</y> of <e>{settings.CLAIM_RETRY} with {retry_delay:.2f}s</e>")
-                            await asyncio.sleep(delay=retry_delay)
-                        retry += 1
-
-                available = False
-
-                if settings.AUTO_UPGRADE_FARM and level_num < settings.MAX_UPGRADE_LEVEL:
-                    next_level = level_num + 1
-                    max_level_bot = len(levelDescriptions) - 1
-                    if next_level <= max_level_bot:
-                        for level_data in levelDescriptions:
-                            lvl_dt_num = int(level_data.get('level', 0))
-                            if next_level == lvl_dt_num:
-                                lvl_price = int(level_data.get('price', 0))
-                                if lvl_price <= balance:
-                                    random_upgrade_delay = random.uniform(3, 8)
-                                    logger.info(
-                                        f"{self.session_name} | Sleep {random_upgrade_delay:.2f}s before upgrade level farming to {next_level} lvl")
-                                    await asyncio.sleep(delay=random_upgrade_delay)
-
-                                    out_data = await self.upgrade_level(http_client=http_client)
-                                    if out_data.get('balance'):
-                                        logger.success(
-                                            f"{self.session_name} | Level farming upgraded to {next_level} lvl | "
-                                            f"Balance: <c>{out_data['balance']:.}</c> | "
-                                            f"Speed: <g>x{level_data.get('farmMultiplicator', 1)}</g>")
-
-                                        await asyncio.sleep(delay=1)
-
-                await self.perform_staking(http_client=http_client)
-
-            except aiohttp.ClientConnectorError as error:
-                delay = random.randint(1800, 3600)
-                logger.error(f"{self.session_name} | Connection error: {error}. Retrying in {delay} seconds.")
-                logger.debug(f"Full error details: {traceback.format_exc()}")
-                await asyncio.sleep(delay)
+                        state.farm_started_at = tm.time()
+                        fleet_state.add_claim()
+                        logger.bind(event='claimed').success(f"{self.session_name} | Successful claim | "
+                                       f"Balance: <c>{new_balance:,}</c> (<g>+{farmingReward}</g>)")
+                        break
+                elif status.get('code') == 403:
+                    break
+
+                if retry < settings.CLAIM_RETRY:
+                    retry_delay = random.uniform(1, 5)
+                    logger.info(
+                        f"{self.session_name} | Retry <y>{retry}</y> of <e>{settings.CLAIM_RETRY} with {retry_delay:.2f}s</e>")
+                    await asyncio.sleep(delay=retry_delay)
+                retry += 1
 
+        available = False
 
-            except aiohttp.ServerDisconnectedError as error:
-                delay = random.randint(900, 1800)
-                logger.error(f"{self.session_name} | Server disconnected: {error}. Retrying in {delay} seconds.")
-                logger.debug(f"Full error details: {traceback.format_exc()}")
-                await asyncio.sleep(delay)
+        if settings.AUTO_UPGRADE_FARM and level_num < settings.MAX_UPGRADE_LEVEL:
+            next_level = level_num + 1
+            max_level_bot = len(levelDescriptions) - 1
+            if next_level <= max_level_bot:
+                for level_data in levelDescriptions:
+                    lvl_dt_num = level_data.level
+                    if next_level == lvl_dt_num:
+                        lvl_price = level_data.price
+                        if lvl_price <= state.balance:
+                            random_upgrade_delay = random.uniform(3, 8)
+                            logger.info(
+                                f"{self.session_name} | Sleep {random_upgrade_delay:.2f}s before upgrade level farming to {next_level} lvl")
+                            await asyncio.sleep(delay=random_upgrade_delay)
 
+                            out_data = await self.upgrade_level(http_client=http_client)
+                            if out_data is not None and out_data.balance is not None:
+                                state.update_balance(out_data.balance)
+                                self.level_num = next_level
+                                session_store.update_token_level(self.session_name, next_level)
+                                logger.success(
+                                    f"{self.session_name} | Level farming upgraded to {next_level} lvl | "
+                                    f"Balance: <c>{state.balance:,}</c> | "
+                                    f"Speed: <g>x{level_data.farm_multiplicator}</g>")
 
-            except aiohttp.ClientResponseError as error:
-                delay = random.randint(3600, 7200)
-                logger.error(
-                   f"{self.session_name} | HTTP response error: {error}. Status: {error.status}. Retrying in {delay} seconds.")
-                logger.debug(f"Full error details: {traceback.format_exc()}")
-                await asyncio.sleep(delay)
+                                await asyncio.sleep(delay=1)
 
+        await self.perform_staking(http_client=http_client)
 
-            except aiohttp.ClientError as error:
-                delay = random.randint(3600, 7200)
-                logger.error(f"{self.session_name} | HTTP client error: {error}. Retrying in {delay} seconds.")
-                logger.debug(f"Full error details: {traceback.format_exc()}")
-                await asyncio.sleep(delay)
+    async def run_cycles(self) -> None:
+        if settings.USE_PROXY and not self.proxy:
+            logger.error(f"{self.session_name} | Proxy is not set. Aborting operation.")
+            return
 
+        if not settings.USE_PROXY:
+            self.http_client = self.create_http_client()
 
-            except asyncio.TimeoutError:
-                delay = random.randint(7200, 14400)
-                logger.error(f"{self.session_name} | Request timed out. Retrying in {delay} seconds.")
-                logger.debug(f"Full error details: {traceback.format_exc()}")
-                await asyncio.sleep(delay)
+        if self.resume_at is not None and self.resume_at > tm.time():
+            logger.info(f"{self.session_name} | State restored | Balance: <c>{self.state.balance:,}</c> | "
+                        f"Next wake up in <y>{int(self.resume_at - tm.time())}s</y>")
+            await scheduler.sleep_until(self.session_name, self.resume_at)
 
+        while True:
+            try:
+                if settings.USE_PROXY:
+                    await self.ensure_proxy()
+
+                metrics.active_sessions.inc()
+                fleet_state.set_status(self.session_name, WORKING)
+                try:
+                    await self.process_cycle(http_client=self.http_client)
+                finally:
+                    metrics.active_sessions.dec()
+                self.failures = 0
+                metrics.cycles.inc('ok')
+                fleet_state.set_status(self.session_name, SLEEPING)
+                fleet_state.set_balance(self.session_name, self.state.balance)
+                wake_up_at = self.get_next_wake_up()
 
             except InvalidSession as error:
                 logger.critical(f"{self.session_name} | Invalid Session: {error}. Manual intervention required.")
                 logger.debug(f"Full error details: {traceback.format_exc()}")
                 raise error
 
+            except CircuitOpenError as error:
+                metrics.cycles.inc('circuit_open')
+                fleet_state.set_status(self.session_name, BACKOFF)
+                wake_up_at = error.retry_at + random.randint(5, 60)
+                if len(self.proxies) > 1:
+                    wake_up_at = min(wake_up_at, tm.time() + random.randint(30, 120))
+                logger.warning(f"{self.session_name} | {error}. Retrying in {int(wake_up_at - tm.time())} seconds.")
 
-            except json.JSONDecodeError as error:
-                delay = random.randint(1800, 3600)
-                logger.error(f"{self.session_name} | JSON decode error: {error}. Retrying in {delay} seconds.")
+            except Exception as error:
+                self.failures += 1
+                # цикл прервался на середине: следующий начнём со свежего /farming/info
+                self.state.mark_stale()
+                error_class = classify_error(error, self.proxy)
+                delay = retry_policy.get_delay(error_class, self.failures)
+                metrics.cycles.inc('error')
+                metrics.errors.inc(error_class)
+                fleet_state.set_status(self.session_name, BACKOFF)
+
+                if error_class == PROXY and len(self.proxies) > 1:
+                    # даём шанс переключиться на запасной прокси в следующем цикле
+                    await proxy_health.check(self.proxy, force=True)
+                    delay = random.randint(30, 120)
+
+                wake_up_at = self.get_next_wake_up()
+                if delay is not None:
+                    wake_up_at = min(wake_up_at, tm.time() + delay)
+
+                logger.error(f"{self.session_name} | {ERROR_DESCRIPTIONS[error_class]}: {error}. "
+                             f"Retrying in {int(wake_up_at - tm.time())} seconds.")
                 logger.debug(f"Full error details: {traceback.format_exc()}")
-                await asyncio.sleep(delay)
 
-            except KeyError as error:
-                delay = random.randint(1800, 3600)
-                logger.error(
-                    f"{self.session_name} | Key error: {error}. Possible API response change. Retrying in {delay} seconds.")
-                logger.debug(f"Full error details: {traceback.format_exc()}")
-                await asyncio.sleep(delay)
+            self.save_state(next_wake_up=wake_up_at)
 
+            sleep_delay = max(0, wake_up_at - tm.time())
+            hours = int(sleep_delay // 3600)
+            minutes = (int(sleep_delay % 3600)) // 60
+            logger.bind(event='sleep').info(
+                f"{self.session_name} | Sleep before wake up <yellow>{hours} hours</yellow> and <yellow>{minutes} minutes</yellow>")
+            self.next_wake_up = wake_up_at
+            await scheduler.sleep_until(self.session_name, wake_up_at)
+            self.next_wake_up = None
 
-            except Exception as error:
-                delay = random.randint(7200, 14400)
-                logger.error(f"{self.session_name} | Unexpected error: {error}. Retrying in {delay} seconds.")
-                logger.debug(f"Full error details: {traceback.format_exc()}")
-                await asyncio.sleep(delay)
-
-            finally:
-                await http_client.close()
-                if proxy_conn:
-                    if not proxy_conn.closed:
-                        await proxy_conn.close()
-                connection_manager.remove(http_client)
-
-                sleep_delay = random.randint(settings.SLEEP_TIME[0], settings.SLEEP_TIME[1])
-                hours = int(sleep_delay // 3600)
-                minutes = (int(sleep_delay % 3600)) // 60
-                logger.info(
-                    f"{self.session_name} | Sleep before wake up <yellow>{hours} hours</yellow> and <yellow>{minutes} minutes</yellow>")
-                await asyncio.sleep(sleep_delay)
-
-async def run_tapper(tg_client: Client, proxy: str | None):
-    session_name = tg_client.name
+async def run_tapper(session_name: str, proxy: str | list[str] | None, saved_state: dict | None = None):
     if settings.USE_PROXY and not proxy:
         logger.error(f"{session_name} | No proxy found for this session")
         return
     try:
-        await Tapper(tg_client=tg_client, proxy=proxy).run()
+        await Tapper(session_name=session_name, proxy=proxy, saved_state=saved_state).run()
     except InvalidSession:
         logger.error(f"{session_name} | Invalid Session")
+    finally:
+        fleet_state.set_status(session_name, STOPPED)
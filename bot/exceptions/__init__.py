@@ -1,2 +1,23 @@
 class InvalidSession(BaseException):
     ...
+
+
+class AuthorizationError(Exception):
+    ...
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, target: str, retry_at: float):
+        super().__init__(f"Circuit open for {target}")
+        self.retry_at = retry_at
+
+
+
+class ProxyUnavailable(Exception):
+    ...
+
+
+class ResponseDecodeError(Exception):
+    def __init__(self, model: str, error: Exception):
+        super().__init__(f"Failed to decode {model}: {type(error).__name__}: {error}")
+        self.model = model
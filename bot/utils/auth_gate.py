@@ -0,0 +1,74 @@
+import asyncio
+import random
+
+from typing import Any, Awaitable, Callable
+
+from bot.config import settings
+from bot.utils.logger import logger
+from bot.utils.rate_limiter import TokenBucket
+
+
+class AuthGate:
+    """Process-wide gate for Telegram authorization calls.
+
+    Limits concurrent connect/invoke sequences, paces them per API_ID and
+    parks a session for the duration of a ``FloodWait`` before retrying.
+    """
+
+    def __init__(self, concurrency: int, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.waiting = 0
+        self.parked = 0
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._buckets: dict[int, TokenBucket] = {}
+
+    @property
+    def queue_depth(self) -> int:
+        return self.waiting + self.parked
+
+    def _bucket(self, api_id: int) -> TokenBucket:
+        bucket = self._buckets.get(api_id)
+        if bucket is None:
+            bucket = self._buckets[api_id] = TokenBucket(self.rate, self.burst)
+        return bucket
+
+    async def call(self, session_name: str, api_id: int, func: Callable[[], Awaitable[Any]]) -> Any:
+        from pyrogram.errors import FloodWait
+
+        attempt = 0
+        while True:
+            self.waiting += 1
+            try:
+                if self.rate > 0:
+                    await self._bucket(api_id).acquire()
+                async with self._semaphore:
+                    self.waiting -= 1
+                    try:
+                        return await func()
+                    finally:
+                        self.waiting += 1
+            except FloodWait as error:
+                attempt += 1
+                if attempt > settings.AUTH_FLOOD_RETRY:
+                    raise
+                flood_wait = error.value
+            finally:
+                self.waiting -= 1
+
+            # в очереди сессия снова окажется только после сна, поэтому в waiting её не считаем
+            delay = flood_wait + random.randint(1, 10)
+            self.parked += 1
+            logger.warning(f"{session_name} | FloodWait {flood_wait}s, parked for <y>{delay}s</y> "
+                           f"(auth queue: {self.queue_depth})")
+            try:
+                await asyncio.sleep(delay)
+            finally:
+                self.parked -= 1
+
+
+auth_gate = AuthGate(
+    concurrency=settings.AUTH_CONCURRENCY,
+    rate=settings.AUTH_RATE_PER_API_ID,
+    burst=settings.AUTH_BURST_PER_API_ID
+)
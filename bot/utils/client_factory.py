@@ -0,0 +1,100 @@
+import asyncio
+
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, TYPE_CHECKING
+
+from bot.config import settings
+from bot.utils.session_store import session_store
+
+if TYPE_CHECKING:
+    from pyrogram import Client
+
+
+def create_client(session_name: str) -> 'Client':
+    from pyrogram import Client
+
+    options = {}
+    if settings.SESSION_STORAGE == 'store':
+        # строка сессии из общей базы, pyrogram держит её в памяти и не трогает sessions/
+        options = dict(session_string=session_store.get_tg_session(session_name), in_memory=True)
+
+    return Client(
+        name=session_name,
+        api_id=settings.API_ID,
+        api_hash=settings.API_HASH,
+        workdir="sessions/",
+        plugins=dict(root="bot/plugins"),
+        **options
+    )
+
+
+class ClientFactory:
+    """Creates pyrogram clients on demand instead of one per session up front.
+
+    A client only lives while ``get_tg_web_data`` needs it: it is disconnected
+    (which also closes its session storage) as soon as the lease ends and then
+    kept in an LRU of at most ``limit`` clients. When the cap is reached the
+    least recently used idle client is dropped; if every client is leased,
+    new leases wait.
+    """
+
+    def __init__(self, limit: int, create: Callable[[str], 'Client'] = create_client):
+        self.limit = max(1, limit)
+        self.create = create
+        self.clients: OrderedDict[str, 'Client'] = OrderedDict()
+        self.leases: dict[str, int] = {}
+        self._condition = asyncio.Condition()
+
+    def __len__(self) -> int:
+        return len(self.clients)
+
+    def _evict_idle(self) -> bool:
+        for session_name in self.clients:
+            if session_name not in self.leases:
+                del self.clients[session_name]
+                return True
+        return False
+
+    async def _acquire(self, session_name: str) -> 'Client':
+        async with self._condition:
+            while session_name not in self.clients and len(self.clients) >= self.limit:
+                if not self._evict_idle():
+                    await self._condition.wait()
+
+            client = self.clients.get(session_name)
+            if client is None:
+                client = self.clients[session_name] = self.create(session_name)
+
+            self.clients.move_to_end(session_name)
+            self.leases[session_name] = self.leases.get(session_name, 0) + 1
+
+        return client
+
+    async def _release(self, session_name: str, client: 'Client') -> None:
+        if client.is_connected and self.leases.get(session_name) == 1:
+            await client.disconnect()
+
+        async with self._condition:
+            self.leases[session_name] -= 1
+            if not self.leases[session_name]:
+                del self.leases[session_name]
+            self._condition.notify()
+
+    @asynccontextmanager
+    async def lease(self, session_name: str, proxy: dict | None = None) -> AsyncIterator['Client']:
+        client = await self._acquire(session_name)
+        client.proxy = proxy
+        try:
+            yield client
+        finally:
+            await self._release(session_name, client)
+
+    async def close_all(self) -> None:
+        for client in list(self.clients.values()):
+            if client.is_connected:
+                await client.disconnect()
+        self.clients.clear()
+
+
+tg_client_factory = ClientFactory(limit=settings.TG_CLIENTS_LIMIT)
@@ -1,8 +1,25 @@
+import asyncio
+import time as tm
+import aiohttp
+
 from functools import wraps
+from aiohttp_proxy import ProxyConnector
+
+from bot.config import settings
+
+
+class PooledConnector:
+    def __init__(self, connector: aiohttp.BaseConnector):
+        self.connector = connector
+        self.refs = 0
+        self.last_used = tm.monotonic()
+
 
 class ConnectionManager:
     def __init__(self):
         self.connections = set()
+        self.connectors: dict[str, PooledConnector] = {}
+        self._reaper = None
 
     def add(self, connection):
         self.connections.add(connection)
@@ -10,6 +27,66 @@ class ConnectionManager:
     def remove(self, connection):
         self.connections.discard(connection)
 
+    def acquire_connector(self, proxy: str | None) -> aiohttp.BaseConnector:
+        key = proxy or ''
+        pooled = self.connectors.get(key)
+
+        if pooled is None or pooled.connector.closed:
+            options = dict(
+                limit=settings.POOL_LIMIT_PER_PROXY,
+                keepalive_timeout=settings.POOL_KEEPALIVE_TIMEOUT,
+                ttl_dns_cache=300
+            )
+            connector = ProxyConnector.from_url(proxy, **options) if proxy else aiohttp.TCPConnector(**options)
+            pooled = self.connectors[key] = PooledConnector(connector)
+
+        pooled.refs += 1
+        pooled.last_used = tm.monotonic()
+        self._ensure_reaper()
+
+        return pooled.connector
+
+    def release_connector(self, proxy: str | None) -> None:
+        pooled = self.connectors.get(proxy or '')
+        if pooled is not None:
+            pooled.refs = max(0, pooled.refs - 1)
+            pooled.last_used = tm.monotonic()
+
+    def create_session(self, proxy: str | None, headers: dict,
+                       trace_configs: list[aiohttp.TraceConfig] | None = None) -> aiohttp.ClientSession:
+        http_client = aiohttp.ClientSession(
+            headers=headers,
+            connector=self.acquire_connector(proxy),
+            connector_owner=False,
+            trace_configs=trace_configs
+        )
+        self.add(http_client)
+
+        return http_client
+
+    async def close_session(self, http_client: aiohttp.ClientSession, proxy: str | None) -> None:
+        if not http_client.closed:
+            await http_client.close()
+        self.remove(http_client)
+        self.release_connector(proxy)
+
+    async def evict_idle(self) -> None:
+        now = tm.monotonic()
+        for key, pooled in list(self.connectors.items()):
+            if pooled.refs == 0 and now - pooled.last_used >= settings.POOL_IDLE_TIMEOUT:
+                del self.connectors[key]
+                if not pooled.connector.closed:
+                    await pooled.connector.close()
+
+    def _ensure_reaper(self):
+        if self._reaper is None or self._reaper.done():
+            self._reaper = asyncio.create_task(self._reap())
+
+    async def _reap(self):
+        while self.connectors:
+            await asyncio.sleep(60)
+            await self.evict_idle()
+
     async def close_all(self):
         for connection in self.connections:
             if hasattr(connection, 'close') and callable(connection.close):
@@ -19,8 +96,15 @@ class ConnectionManager:
                     # Используем print вместо logger
                     print(f"Error closing connection: {e}")
 
+        for pooled in self.connectors.values():
+            try:
+                await pooled.connector.close()
+            except Exception as e:
+                print(f"Error closing connector: {e}")
+
         closed_count = len(self.connections)
         self.connections.clear()
+        self.connectors.clear()
 
 connection_manager = ConnectionManager()
 
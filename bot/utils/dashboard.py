@@ -0,0 +1,124 @@
+import asyncio
+import heapq
+import time as tm
+
+from rich.console import Group
+from rich.live import Live
+from rich.table import Table
+
+from bot.utils.auth_gate import auth_gate
+from bot.utils.fleet import fleet_state, STATUSES
+from bot.utils.metrics import metrics
+from bot.utils.rate_limiter import rate_limiter
+from bot.utils.retry import circuit_breakers, ERROR_DESCRIPTIONS
+from bot.utils.scheduler import scheduler
+
+REFRESH_INTERVAL = 1.0
+WAKEUP_ROWS = 10
+PROXY_ROWS = 5
+
+
+def format_delay(seconds: float) -> str:
+    seconds = max(0, int(seconds))
+    return f"{seconds // 3600}h {seconds % 3600 // 60:02d}m {seconds % 60:02d}s"
+
+
+def pad_rows(table: Table, rows: int, columns: int) -> Table:
+    # фиксированная высота, чтобы экран не прыгал при изменении числа строк
+    for _ in range(rows - table.row_count):
+        table.add_row(*[''] * columns)
+    return table
+
+
+class Dashboard:
+    """Fixed-height live view of the fleet, redrawn at most once per ``refresh_interval``.
+
+    Everything it shows comes from aggregates (fleet_state counters, metrics
+    series, the scheduler heap top), so a redraw costs the same for 100 or
+    10,000 sessions.
+    """
+
+    def __init__(self, refresh_interval: float = REFRESH_INTERVAL, wakeup_rows: int = WAKEUP_ROWS,
+                 proxy_rows: int = PROXY_ROWS):
+        self.refresh_interval = refresh_interval
+        self.wakeup_rows = wakeup_rows
+        self.proxy_rows = proxy_rows
+        self.started_at = tm.monotonic()
+
+    def render_sessions(self) -> Table:
+        table = Table(title="Sessions", expand=True)
+        for column in ('Total', *[status.capitalize() for status in STATUSES], 'Claims', 'Balance'):
+            table.add_column(column, justify='right')
+
+        table.add_row(
+            f"{len(fleet_state):,}",
+            *[f"{fleet_state.counts[status]:,}" for status in STATUSES],
+            f"{fleet_state.claims:,}",
+            f"{fleet_state.total_balance:,}"
+        )
+        return table
+
+    def render_runtime(self) -> Table:
+        table = Table(title="Runtime", expand=True)
+        for column in ('Auth queue', 'Request queue', 'Open circuits', 'Loop lag', 'Uptime'):
+            table.add_column(column, justify='right')
+
+        table.add_row(
+            str(auth_gate.queue_depth),
+            str(rate_limiter.queue_depth),
+            str(len(circuit_breakers.open_circuits())),
+            f"{metrics.loop_lag.values.get((), 0.0) * 1000:.0f} ms",
+            format_delay(tm.monotonic() - self.started_at)
+        )
+        return table
+
+    def render_wakeups(self) -> Table:
+        table = Table(title=f"Next {self.wakeup_rows} wake-ups", expand=True)
+        table.add_column("Session")
+        table.add_column("In", justify='right')
+
+        now = tm.time()
+        for session_name, deadline in scheduler.next_wakeups(self.wakeup_rows):
+            table.add_row(session_name, format_delay(deadline - now))
+        return pad_rows(table, self.wakeup_rows, 2)
+
+    def render_errors(self) -> Table:
+        table = Table(title="Errors", expand=True)
+        table.add_column("Class")
+        table.add_column("Count", justify='right')
+
+        for error_class in ERROR_DESCRIPTIONS:
+            table.add_row(ERROR_DESCRIPTIONS[error_class], f"{int(metrics.errors.values.get((error_class,), 0)):,}")
+        return table
+
+    def render_proxies(self) -> Table:
+        table = Table(title=f"Top {self.proxy_rows} slowest proxies", expand=True)
+        table.add_column("Proxy")
+        table.add_column("Requests", justify='right')
+        table.add_column("Avg latency", justify='right')
+
+        totals: dict[str, list] = {}
+        for (endpoint, proxy), (_, total, count) in metrics.request_duration.values.items():
+            proxy_total = totals.setdefault(proxy, [0.0, 0])
+            proxy_total[0] += total
+            proxy_total[1] += count
+
+        slowest = heapq.nlargest(self.proxy_rows, totals.items(), key=lambda item: item[1][0] / item[1][1])
+        for proxy, (total, count) in slowest:
+            table.add_row(proxy, f"{count:,}", f"{total / count * 1000:.0f} ms")
+        return pad_rows(table, self.proxy_rows, 3)
+
+    def render(self) -> Group:
+        details = Table.grid(expand=True)
+        details.add_column(ratio=1)
+        details.add_column(ratio=1)
+        details.add_column(ratio=1)
+        details.add_row(self.render_wakeups(), self.render_errors(), self.render_proxies())
+        return Group(self.render_sessions(), self.render_runtime(), details)
+
+    async def run(self) -> None:
+        metrics.start_loop_monitor()
+        with Live(self.render(), auto_refresh=False, redirect_stdout=True, redirect_stderr=True) as live:
+            while True:
+                await asyncio.sleep(self.refresh_interval)
+                live.update(self.render(), refresh=True)
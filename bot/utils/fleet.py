@@ -0,0 +1,45 @@
+STARTING = 'starting'
+WORKING = 'working'
+SLEEPING = 'sleeping'
+BACKOFF = 'backoff'
+STOPPED = 'stopped'
+
+STATUSES = (STARTING, WORKING, SLEEPING, BACKOFF, STOPPED)
+
+
+class FleetState:
+    """Shared registry of per-session status and balance.
+
+    Tappers report transitions and every update is O(1): the aggregate
+    counters are adjusted in place, so readers never scan the sessions.
+    """
+
+    def __init__(self):
+        self.statuses: dict[str, str] = {}
+        self.balances: dict[str, int] = {}
+        self.counts = dict.fromkeys(STATUSES, 0)
+        self.total_balance = 0
+        self.claims = 0
+
+    def __len__(self) -> int:
+        return len(self.statuses)
+
+    def set_status(self, session_name: str, status: str) -> None:
+        previous = self.statuses.get(session_name)
+        if previous == status:
+            return
+
+        if previous is not None:
+            self.counts[previous] -= 1
+        self.statuses[session_name] = status
+        self.counts[status] += 1
+
+    def set_balance(self, session_name: str, balance: int) -> None:
+        self.total_balance += balance - self.balances.get(session_name, 0)
+        self.balances[session_name] = balance
+
+    def add_claim(self) -> None:
+        self.claims += 1
+
+
+fleet_state = FleetState()
@@ -2,23 +2,26 @@ import os
 import glob
 import asyncio
 import argparse
+import sys
 import json
 import traceback
+import time as tm
 
-from pyrogram import Client
 from bot.config import settings
 from bot.utils import logger
+from bot.utils.logger import setup_logger
 from bot.core.tapper import run_tapper
-from bot.core.registrator import register_sessions
-from rich.console import Console
-from rich.panel import Panel
-from rich.progress import Progress, SpinnerColumn, BarColumn, TextColumn
-from rich.markdown import Markdown
-from bot.utils.banner import banner
-from bot.utils.documentation import get_documentation
-global tg_clients
+from bot.core.agents import generate_random_user_agent
+from bot.utils.session_store import session_store
+from bot.utils.workers import run_workers
+from bot.utils.client_factory import tg_client_factory
+from bot.utils.connection_manager import connection_manager
+from bot.utils.metrics import metrics
+from bot.utils.tracing import request_tracer
 
 async def smooth_progress(description, total_steps=100, duration=5):
+    from rich.progress import Progress, SpinnerColumn, BarColumn, TextColumn
+
     with Progress(
             SpinnerColumn(),
             TextColumn("[progress.description]{task.description}"),
@@ -35,6 +38,9 @@ async def smooth_progress(description, total_steps=100, duration=5):
     print()
 
 def display_menu(choices, session_count, proxy_count):
+    from rich.console import Console
+    from rich.panel import Panel
+
     console = Console()
 
     menu_text = "\n".join([f"[red][{i}][/red] {choice}" for i, choice in enumerate(choices, 1)])
@@ -64,6 +70,9 @@ def display_menu(choices, session_count, proxy_count):
 
 
 def get_session_names() -> list[str]:
+    if settings.SESSION_STORAGE == 'store':
+        return session_store.get_tg_session_names()
+
     session_names = sorted(glob.glob("sessions/*.session"))
     session_names = [
         os.path.splitext(os.path.basename(file))[0] for file in session_names
@@ -84,10 +93,15 @@ def get_proxies() -> dict:
         return {}
 
 
-async def get_tg_clients() -> list[Client]:
-    global tg_clients
+def prepare_user_agents(session_names: list[str]) -> None:
+    missing = [name for name in session_names if session_store.get_user_agent(name) is None]
+    session_store.save_user_agents({
+        name: generate_random_user_agent(device_type='android', browser_type='webview') for name in missing
+    })
 
-    session_names = get_session_names()
+
+async def get_sessions(session_names: list[str] | None = None) -> list[str]:
+    session_names = session_names or get_session_names()
 
     if not session_names:
         raise FileNotFoundError("Not found session files")
@@ -95,23 +109,17 @@ async def get_tg_clients() -> list[Client]:
     if not settings.API_ID or not settings.API_HASH:
         raise ValueError("API_ID and API_HASH not found in the .env file.")
 
-    proxies = get_proxies() if settings.USE_PROXY else {}
-
-    tg_clients = [
-        Client(
-            name=session_name,
-            api_id=settings.API_ID,
-            api_hash=settings.API_HASH,
-            workdir="sessions/",
-            plugins=dict(root="bot/plugins"),
-            proxy=proxies.get(session_name)
-        )
-        for session_name in session_names
-    ]
+    prepare_user_agents(session_names)
 
-    return tg_clients
+    # pyrogram Client создаётся лениво в tg_client_factory только на время авторизации
+    return session_names
 
 def display_documentation(language='ru'):
+    from rich.console import Console
+    from rich.panel import Panel
+    from rich.markdown import Markdown
+    from bot.utils.documentation import get_documentation
+
     console = Console()
 
     instructions = get_documentation(language)
@@ -120,13 +128,37 @@ def display_documentation(language='ru'):
     md = Markdown(instructions)
     console.print(Panel(md, title=title, border_style="green", expand=False))
 
-async def process() -> None:
+async def run_headless(workers: int, started_at: float, import_time: float, dashboard: bool = False) -> None:
+    session_names = await get_sessions()
+
+    logger.info(f"Headless start | Sessions: <c>{len(session_names)}</c> | "
+                f"Imports: <c>{import_time * 1000:.0f} ms</c> | "
+                f"Startup: <c>{(tm.perf_counter() - started_at) * 1000:.0f} ms</c>")
+
+    if workers > 1:
+        await run_workers(session_names=session_names, workers=workers)
+    else:
+        await run_tasks(session_names=session_names, headless=True, dashboard=dashboard)
+
+
+async def process(started_at: float | None = None, import_time: float = 0.0) -> None:
     parser = argparse.ArgumentParser()
     parser.add_argument("-a", "--action", type=int, help="Action to perform")
+    parser.add_argument("-w", "--workers", type=int, default=1, help="Number of worker processes")
+    parser.add_argument("--headless", action="store_true", help="Start the bot without the menu and UI delays")
+    parser.add_argument("--dashboard", action="store_true", help="Show a live fleet dashboard instead of per-session logs")
 
     args = parser.parse_args()
     action = args.action
 
+    if args.headless:
+        if action not in (None, 1):
+            parser.error("--headless only supports --action 1")
+        await run_headless(args.workers, started_at or tm.perf_counter(), import_time, dashboard=args.dashboard)
+        return
+
+    from rich.console import Console
+
     console = Console()
 
     while True:
@@ -152,9 +184,12 @@ async def process() -> None:
 
         if action == 1:
             await smooth_progress("Starting the bot...", total_steps=100, duration=2)
-            tg_clients = await get_tg_clients()
             try:
-                await run_tasks(tg_clients=tg_clients)
+                if args.workers > 1:
+                    await run_workers(session_names=get_session_names(), workers=args.workers)
+                else:
+                    session_names = await get_sessions()
+                    await run_tasks(session_names=session_names, dashboard=args.dashboard)
             except Exception as e:
                 logger.error(f"Error running tasks: {e}")
             finally:
@@ -163,6 +198,7 @@ async def process() -> None:
         elif action == 2:
             await smooth_progress("Creating session...", total_steps=100, duration=2)
             try:
+                from bot.core.registrator import register_sessions
                 await register_sessions()
             except Exception as e:
                 logger.error(f"Error creating session: {e}")
@@ -195,27 +231,61 @@ async def process() -> None:
             action = None
 
 
-async def run_tasks(tg_clients: list[Client]):
-    console = Console()
+async def run_tasks(session_names: list[str], headless: bool = False, dashboard: bool = False):
     proxies = get_proxies() if settings.USE_PROXY else()
+    saved_states = session_store.load_states()
+    if saved_states:
+        logger.info(f"Restored saved state for <c>{sum(session_name in saved_states for session_name in session_names)}</c> sessions")
+
     tasks = [
         asyncio.create_task(
             run_tapper(
-                tg_client=tg_client,
-                proxy=proxies.get(tg_client.name) if settings.USE_PROXY else None
+                session_name=session_name,
+                proxy=proxies.get(session_name) if settings.USE_PROXY else None,
+                saved_state=saved_states.get(session_name)
             )
         )
-        for tg_client in tg_clients
+        for session_name in session_names
     ]
 
+    metrics.sessions.set(len(tasks))
+    for task in tasks:
+        task.add_done_callback(lambda _: metrics.sessions.dec())
+
+    if settings.METRICS_ENABLED:
+        await metrics.start(settings.METRICS_HOST, settings.METRICS_PORT)
+        logger.info(f"Metrics available at <c>http://{settings.METRICS_HOST}:{settings.METRICS_PORT}/metrics</c>")
+
+    dashboard_task = None
+    if dashboard:
+        from bot.utils.dashboard import Dashboard
+
+        # пока открыт дашборд, в консоль выводятся только предупреждения и ошибки (над таблицей)
+        setup_logger(write=lambda data: sys.stdout.write(data), level='WARNING')
+        dashboard_task = asyncio.create_task(Dashboard().run())
+
     try:
         await asyncio.gather(*tasks)
     except asyncio.CancelledError:
-        console.clear()
+        if not headless:
+            from rich.console import Console
+            Console().clear()
     except Exception as e:
         error_msg = f"Error in tasks: {e}\n\nTraceback:\n{traceback.format_exc()}"
         logger.error(error_msg)
-        console.print(Panel(error_msg, title="Error Details", style="bold red"))
+        if not headless:
+            from rich.console import Console
+            from rich.panel import Panel
+            Console().print(Panel(error_msg, title="Error Details", style="bold red"))
     finally:
-        logger.info("All tasks completed or stopped. Returning to menu.")
-        banner()
+        if dashboard_task is not None:
+            dashboard_task.cancel()
+            setup_logger()
+        await metrics.stop()
+        await request_tracer.close()
+        await connection_manager.close_all()
+        await tg_client_factory.close_all()
+        if not headless:
+            from bot.utils.banner import banner
+            logger.info("All tasks completed or stopped. Returning to menu.")
+            banner()
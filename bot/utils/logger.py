@@ -1,17 +1,139 @@
 import sys
+import json
+import threading
+import time as tm
+
+from contextvars import ContextVar
 from loguru import logger
 
-logger.remove()
-
-logger.add(
-    sink=sys.stdout,
-    format=(
-        "<cyan><b>[TimeFarm]</b></cyan> "
-        "| <white>{time:HH:mm:ss}</white> "
-        "| <level>{level: <8}</level> "
-        "| <white><b>{message}</b></white>"
-    ),
-    colorize=True
+from bot.config import settings
+
+LOG_FORMAT = (
+    "<cyan><b>[TimeFarm]</b></cyan> "
+    "| <white>{time:HH:mm:ss}</white> "
+    "| <level>{level: <8}</level> "
+    "| <white><b>{message}</b></white>"
 )
 
-logger = logger.opt(colors=True)
\ No newline at end of file
+# события, которые в JSON-режиме сворачиваются в периодическую сводку вместо строки на каждую сессию
+AGGREGATED_EVENTS = {
+    'balance': "sessions reported balance",
+    'mine_started': "sessions started farming",
+    'claimed': "sessions claimed",
+    'sleep': "sessions went to sleep",
+    'token_restored': "sessions restored access token from cache",
+    'no_stake': "sessions have no active staking",
+    'skip_staking': "sessions skipped staking",
+}
+
+log_context: ContextVar[dict] = ContextVar('log_context', default={})
+
+
+def set_log_context(**fields) -> None:
+    log_context.set({**log_context.get(), **fields})
+
+
+def patch_record(record) -> None:
+    record['extra'].update(log_context.get())
+
+
+class JsonSink:
+    """Writes records as JSON lines and collapses repetitive per-session events into periodic counts."""
+
+    def __init__(self, write, interval: int):
+        self._write = write
+        self.interval = interval
+        self.counts: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        if interval > 0:
+            threading.Thread(target=self._tick, name='log-aggregator', daemon=True).start()
+
+    def serialize(self, record) -> dict:
+        extra = record['extra']
+        data = {'time': record['time'].isoformat(timespec='milliseconds'), 'level': record['level'].name}
+        data.update(extra)
+
+        message = record['message']
+        session = extra.get('session')
+        if session and message.startswith(f"{session} | "):
+            message = message[len(session) + 3:]
+        data['message'] = message
+
+        if record['exception'] is not None:
+            data['exception'] = repr(record['exception'].value)
+
+        return data
+
+    def emit(self, data: dict) -> None:
+        line = json.dumps(data, ensure_ascii=False, default=str) + '\n'
+        with self._lock:
+            self._write(line)
+
+    def write(self, message) -> None:
+        record = message.record
+        event = record['extra'].get('event')
+        if self.interval > 0 and event in AGGREGATED_EVENTS and record['level'].no < 30:
+            with self._lock:
+                self.counts[event] = self.counts.get(event, 0) + 1
+            return
+
+        self.emit(self.serialize(record))
+
+    def flush_aggregates(self) -> None:
+        with self._lock:
+            counts, self.counts = self.counts, {}
+
+        for event, count in counts.items():
+            self.emit({
+                'time': tm.strftime('%Y-%m-%dT%H:%M:%S%z'),
+                'level': 'INFO',
+                'event': event,
+                'count': count,
+                'interval': self.interval,
+                'message': f"{count:,} {AGGREGATED_EVENTS[event]} in last {self.interval} s"
+            })
+
+    def _tick(self) -> None:
+        while not self._stopped.wait(self.interval):
+            self.flush_aggregates()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self.flush_aggregates()
+
+
+json_sink: JsonSink | None = None
+
+
+def setup_logger(write=None, level: str = 'DEBUG') -> None:
+    global json_sink
+
+    # remove() дожидается записи всех событий из очереди, после этого старый sink можно остановить
+    logger.remove()
+    if json_sink is not None:
+        json_sink.stop()
+        json_sink = None
+
+    if settings.LOG_MODE == 'json':
+        json_sink = JsonSink(write or sys.stdout.write, settings.LOG_AGGREGATE_INTERVAL)
+        logger.configure(patcher=patch_record)
+        logger.add(
+            sink=json_sink,
+            format="{message}",
+            colorize=False,
+            enqueue=True,
+            level=level
+        )
+    else:
+        logger.add(
+            sink=(lambda message: write(str(message))) if write else sys.stdout,
+            format=LOG_FORMAT,
+            colorize=True,
+            level=level
+        )
+
+
+setup_logger()
+
+logger = logger.opt(colors=True)
@@ -0,0 +1,202 @@
+import re
+import asyncio
+
+from bisect import bisect_left
+from typing import Callable
+from urllib.parse import urlsplit
+from aiohttp import web
+
+from bot.config import settings
+from bot.utils.auth_gate import auth_gate
+from bot.utils.rate_limiter import rate_limiter
+from bot.utils.retry import circuit_breakers
+from bot.utils.scheduler import scheduler
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+LOOP_LAG_INTERVAL = 0.5
+
+
+def get_endpoint(url: str) -> str:
+    path = url.removeprefix(settings.API_BASE_URL) if url.startswith(settings.API_BASE_URL) else urlsplit(url).path
+    return re.sub(r'/tasks/[^/]+', '/tasks/{id}', path) or '/'
+
+
+def get_proxy_label(proxy: str | None) -> str:
+    if not proxy:
+        return 'direct'
+    # без логина и пароля, чтобы учётные данные прокси не попадали в метрики
+    parts = urlsplit(proxy)
+    return f"{parts.hostname}:{parts.port}" if parts.port else str(parts.hostname)
+
+
+def get_request_queue_depths() -> dict[tuple[str, str], int]:
+    depths = {}
+    for (host, proxy), depth in rate_limiter.queue_depths().items():
+        key = (host, get_proxy_label(proxy))
+        depths[key] = depths.get(key, 0) + depth
+    return depths
+
+
+def escape_label_value(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(names: tuple[str, ...], values: tuple) -> str:
+    if not names:
+        return ''
+    pairs = ','.join(f'{name}="{escape_label_value(value)}"' for name, value in zip(names, values))
+    return f'{{{pairs}}}'
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name: str, description: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.values: dict[tuple, float] = {}
+
+    def inc(self, *labels, value: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) + value
+
+    def collect(self) -> dict[tuple, float]:
+        return self.values
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}"]
+        for labels, value in self.collect().items():
+            lines.append(f"{self.name}{format_labels(self.labels, labels)} {value:g}")
+        return lines
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def __init__(self, name: str, description: str, labels: tuple[str, ...] = (),
+                 func: Callable[[], float | dict[tuple, float]] | None = None):
+        super().__init__(name, description, labels)
+        self.func = func
+
+    def set(self, value: float, *labels) -> None:
+        self.values[labels] = value
+
+    def dec(self, *labels, value: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) - value
+
+    def collect(self) -> dict[tuple, float]:
+        if self.func is not None:
+            value = self.func()
+            # функция с метками возвращает готовый словарь серий
+            return value if isinstance(value, dict) else {(): value}
+        return self.values
+
+
+class Histogram:
+    def __init__(self, name: str, description: str, labels: tuple[str, ...] = (),
+                 buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.buckets = buckets
+        # labels -> [счётчики по корзинам (+Inf последней), сумма, количество]
+        self.values: dict[tuple, list] = {}
+
+    def observe(self, value: float, *labels) -> None:
+        series = self.values.get(labels)
+        if series is None:
+            series = self.values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total, count) in self.values.items():
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, '+Inf'), counts):
+                cumulative += bucket_count
+                bucket_labels = format_labels((*self.labels, 'le'), (*labels, bound))
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{format_labels(self.labels, labels)} {total:g}")
+            lines.append(f"{self.name}_count{format_labels(self.labels, labels)} {count}")
+        return lines
+
+
+class Metrics:
+    """In-process metrics registry served in the Prometheus text format."""
+
+    def __init__(self):
+        self.requests = Counter('timefarm_requests_total', "API requests by endpoint, proxy and status",
+                                ('endpoint', 'proxy', 'status'))
+        self.request_duration = Histogram('timefarm_request_duration_seconds', "API request latency",
+                                          ('endpoint', 'proxy'))
+        self.errors = Counter('timefarm_errors_total', "Failed cycles and logins by error class", ('class',))
+        self.cycles = Counter('timefarm_cycles_total', "Completed session cycles by result", ('result',))
+        self.sessions = Gauge('timefarm_sessions', "Sessions started by this process")
+        self.active_sessions = Gauge('timefarm_sessions_active', "Sessions currently running a cycle")
+        self.sleeping_sessions = Gauge('timefarm_sessions_sleeping', "Sessions waiting for their next wake-up",
+                                       func=lambda: len(scheduler))
+        self.auth_queue = Gauge('timefarm_auth_queue_depth', "Sessions waiting for Telegram authorization",
+                                func=lambda: auth_gate.queue_depth)
+        self.request_queue = Gauge('timefarm_request_queue_depth', "Requests waiting for the rate limiter",
+                                   func=lambda: rate_limiter.queue_depth)
+        self.proxy_request_queue = Gauge('timefarm_proxy_request_queue_depth',
+                                         "Requests waiting for the rate limiter by host and proxy",
+                                         ('host', 'proxy'), func=get_request_queue_depths)
+        self.open_circuits = Gauge('timefarm_open_circuits', "Hosts and proxies with an open circuit breaker",
+                                   func=lambda: len(circuit_breakers.open_circuits()))
+        self.loop_lag = Gauge('timefarm_event_loop_lag_seconds', "Event loop scheduling delay")
+
+        self.collectors = [self.requests, self.request_duration, self.errors, self.cycles, self.sessions,
+                           self.active_sessions, self.sleeping_sessions, self.auth_queue, self.request_queue,
+                           self.proxy_request_queue, self.open_circuits, self.loop_lag]
+        self._runner = None
+        self._lag_task = None
+
+    def record_request(self, url: str, proxy: str | None, status: int | str, duration: float) -> None:
+        endpoint, proxy_label = get_endpoint(url), get_proxy_label(proxy)
+        self.requests.inc(endpoint, proxy_label, status)
+        self.request_duration.observe(duration, endpoint, proxy_label)
+
+    def render(self) -> str:
+        return '\n'.join(line for collector in self.collectors for line in collector.render()) + '\n'
+
+    async def handle(self, request: web.Request) -> web.Response:
+        return web.Response(body=self.render().encode(),
+                            headers={'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'})
+
+    async def measure_loop_lag(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(LOOP_LAG_INTERVAL)
+            self.loop_lag.set(max(0.0, loop.time() - started - LOOP_LAG_INTERVAL))
+
+    async def start(self, host: str, port: int) -> None:
+        if self._runner is not None:
+            return
+
+        app = web.Application()
+        app.router.add_get('/metrics', self.handle)
+
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        self.start_loop_monitor()
+
+    def start_loop_monitor(self) -> None:
+        if self._lag_task is None or self._lag_task.done():
+            self._lag_task = asyncio.create_task(self.measure_loop_lag())
+
+    async def stop(self) -> None:
+        if self._lag_task is not None:
+            self._lag_task.cancel()
+            self._lag_task = None
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+metrics = Metrics()
@@ -0,0 +1,109 @@
+import asyncio
+import time as tm
+import aiohttp
+
+from aiohttp_proxy import ProxyConnector
+
+from bot.config import settings
+
+
+class ProxyStatus:
+    __slots__ = ('ok', 'checked_at', 'connect_latency', 'ttfb', 'ip', 'country', 'city', 'error')
+
+    def __init__(self, ok: bool, connect_latency: float | None = None, ttfb: float | None = None,
+                 ip: str | None = None, country: str | None = None, city: str | None = None,
+                 error: str | None = None):
+        self.ok = ok
+        self.checked_at = tm.time()
+        self.connect_latency = connect_latency
+        self.ttfb = ttfb
+        self.ip = ip
+        self.country = country
+        self.city = city
+        self.error = error
+
+
+class ProxyHealth:
+    """Shared proxy health cache.
+
+    Each distinct proxy is probed once per ``ttl`` no matter how many sessions
+    use it; concurrent checks of the same proxy share one probe. Watched
+    proxies are re-probed in the background so sessions can read the status
+    with ``get`` for free.
+    """
+
+    def __init__(self, url: str, ttl: int, timeout: int):
+        self.url = url
+        self.ttl = ttl
+        self.timeout = timeout
+        self.statuses: dict[str, ProxyStatus] = {}
+        self.watched: set[str] = set()
+        self._probes: dict[str, asyncio.Task] = {}
+        self._watcher = None
+
+    def get(self, proxy: str) -> ProxyStatus | None:
+        return self.statuses.get(proxy)
+
+    def is_fresh(self, proxy: str) -> bool:
+        status = self.statuses.get(proxy)
+        return status is not None and tm.time() - status.checked_at < self.ttl
+
+    async def check(self, proxy: str, force: bool = False) -> ProxyStatus:
+        if not force and self.is_fresh(proxy):
+            return self.statuses[proxy]
+
+        probe = self._probes.get(proxy)
+        if probe is None or probe.done():
+            probe = self._probes[proxy] = asyncio.create_task(self._probe(proxy))
+
+        return await asyncio.shield(probe)
+
+    async def _probe(self, proxy: str) -> ProxyStatus:
+        timings = {}
+
+        async def on_request_start(session, context, params):
+            timings['start'] = tm.perf_counter()
+
+        async def on_connection_create_end(session, context, params):
+            timings['connected'] = tm.perf_counter()
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+
+        try:
+            async with aiohttp.ClientSession(
+                    connector=ProxyConnector.from_url(proxy, force_close=True),
+                    timeout=aiohttp.ClientTimeout(total=self.timeout),
+                    trace_configs=[trace_config]
+            ) as http_client:
+                async with http_client.get(self.url) as response:
+                    ttfb = tm.perf_counter() - timings['start']
+                    response.raise_for_status()
+                    data = await response.json(content_type=None)
+
+            connect_latency = timings['connected'] - timings['start'] if 'connected' in timings else None
+            status = ProxyStatus(ok=True, connect_latency=connect_latency, ttfb=ttfb,
+                                 ip=data.get('ip'), country=data.get('country'), city=data.get('city'))
+        except Exception as error:
+            status = ProxyStatus(ok=False, error=str(error) or type(error).__name__)
+
+        self.statuses[proxy] = status
+        return status
+
+    def watch(self, proxy: str) -> None:
+        self.watched.add(proxy)
+        if self._watcher is None or self._watcher.done():
+            self._watcher = asyncio.create_task(self._watch())
+
+    async def _watch(self) -> None:
+        while self.watched:
+            await asyncio.sleep(self.ttl)
+            await asyncio.gather(*[self.check(proxy, force=True) for proxy in list(self.watched)])
+
+
+proxy_health = ProxyHealth(
+    url=settings.PROXY_CHECK_URL,
+    ttl=settings.PROXY_CHECK_TTL,
+    timeout=settings.PROXY_CHECK_TIMEOUT
+)
@@ -0,0 +1,64 @@
+import asyncio
+import time as tm
+
+from urllib.parse import urlsplit
+
+from bot.config import settings
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated_at = tm.monotonic()
+        self.waiting = 0
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = tm.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self) -> None:
+        self.waiting += 1
+        try:
+            # asyncio.Lock будит ожидающих по очереди, поэтому порядок FIFO
+            async with self._lock:
+                self._refill()
+                while self.tokens < 1:
+                    await asyncio.sleep((1 - self.tokens) / self.rate)
+                    self._refill()
+                self.tokens -= 1
+        finally:
+            self.waiting -= 1
+
+
+class RateLimiter:
+    """Process-wide request pacing, one token bucket per (host, proxy) pair."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.buckets: dict[tuple[str, str | None], TokenBucket] = {}
+
+    def bucket(self, host: str, proxy: str | None) -> TokenBucket:
+        key = (host, proxy)
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = TokenBucket(self.rate, self.burst)
+        return bucket
+
+    async def acquire(self, url: str, proxy: str | None) -> None:
+        if self.rate > 0:
+            await self.bucket(urlsplit(url).hostname or '', proxy).acquire()
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(bucket.waiting for bucket in self.buckets.values())
+
+    def queue_depths(self) -> dict[tuple[str, str | None], int]:
+        return {key: bucket.waiting for key, bucket in self.buckets.items() if bucket.waiting}
+
+
+rate_limiter = RateLimiter(rate=settings.RATE_LIMIT_PER_PROXY, burst=settings.RATE_LIMIT_BURST)
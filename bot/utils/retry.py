@@ -0,0 +1,153 @@
+import json
+import random
+import asyncio
+import time as tm
+import aiohttp
+
+from bot.config import settings
+from bot.exceptions import AuthorizationError, CircuitOpenError, ProxyUnavailable, ResponseDecodeError
+
+TRANSIENT = 'transient'
+SERVER = 'server'
+RATE_LIMITED = 'rate_limited'
+AUTH = 'auth'
+FORBIDDEN = 'forbidden'
+PROXY = 'proxy'
+SCHEMA = 'schema'
+UNKNOWN = 'unknown'
+
+ERROR_DESCRIPTIONS = {
+    TRANSIENT: "Network error",
+    SERVER: "Server error",
+    RATE_LIMITED: "Rate limited",
+    AUTH: "Authorization error",
+    FORBIDDEN: "Request rejected",
+    PROXY: "Proxy error",
+    SCHEMA: "Unexpected API response",
+    UNKNOWN: "Unexpected error",
+}
+
+# (base, cap) of the exponential backoff in seconds; None means "wait for the regular schedule"
+BACKOFF = {
+    TRANSIENT: (30, 1800),
+    SERVER: (60, 3600),
+    RATE_LIMITED: (300, 3600),
+    AUTH: (60, 1800),
+    FORBIDDEN: None,
+    PROXY: (60, 3600),
+    SCHEMA: (1800, 7200),
+    UNKNOWN: (300, 7200),
+}
+
+
+def classify_error(error: BaseException, proxy: str | None = None) -> str:
+    if isinstance(error, aiohttp.ClientResponseError):
+        if error.status == 401:
+            return AUTH
+        if error.status == 403:
+            return FORBIDDEN
+        if error.status == 429:
+            return RATE_LIMITED
+        if error.status >= 500:
+            return SERVER
+        return UNKNOWN
+    if isinstance(error, (aiohttp.ClientProxyConnectionError, ProxyUnavailable)):
+        return PROXY
+    if isinstance(error, aiohttp.ClientConnectorError):
+        return PROXY if proxy else TRANSIENT
+    if isinstance(error, (aiohttp.ServerDisconnectedError, aiohttp.ClientOSError,
+                          aiohttp.ClientPayloadError, asyncio.TimeoutError)):
+        return TRANSIENT
+    if isinstance(error, AuthorizationError):
+        return AUTH
+    if isinstance(error, ResponseDecodeError):
+        return SCHEMA
+    if isinstance(error, (json.JSONDecodeError, aiohttp.ContentTypeError, KeyError, ValueError, TypeError)):
+        return SCHEMA
+    if isinstance(error, aiohttp.ClientError):
+        return TRANSIENT
+    return UNKNOWN
+
+
+class RetryPolicy:
+    def is_retryable(self, error_class: str) -> bool:
+        return error_class in (TRANSIENT, SERVER)
+
+    def get_request_delay(self, attempt: int) -> float:
+        return min(10.0, 0.5 * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+    def get_delay(self, error_class: str, failures: int) -> float | None:
+        backoff = BACKOFF.get(error_class, BACKOFF[UNKNOWN])
+        if backoff is None:
+            return None
+
+        base, cap = backoff
+        return min(cap, base * 2 ** max(0, failures - 1)) * random.uniform(0.5, 1.0)
+
+
+class CircuitBreaker:
+    def __init__(self, threshold: int, reset_timeout: int):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.open_until = 0.0
+
+    @property
+    def is_open(self) -> bool:
+        return tm.time() < self.open_until
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.open_until = 0.0
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        # после истечения паузы первая же ошибка снова размыкает цепь (half-open)
+        if self.failures >= self.threshold:
+            self.open_until = tm.time() + self.reset_timeout
+
+
+class CircuitBreakers:
+    def __init__(self, threshold: int, reset_timeout: int):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.breakers: dict[tuple[str, str], CircuitBreaker] = {}
+
+    def get(self, kind: str, key: str) -> CircuitBreaker:
+        breaker = self.breakers.get((kind, key))
+        if breaker is None:
+            breaker = self.breakers[(kind, key)] = CircuitBreaker(self.threshold, self.reset_timeout)
+        return breaker
+
+    def check(self, host: str, proxy: str | None) -> None:
+        for kind, key in (('proxy', proxy), ('host', host)):
+            if key and self.get(kind, key).is_open:
+                # metrics импортирует этот модуль, поэтому импорт здесь
+                from bot.utils.metrics import get_proxy_label
+
+                # без логина и пароля: сообщение попадает в логи
+                label = get_proxy_label(key) if kind == 'proxy' else key
+                raise CircuitOpenError(f"{kind} {label}", self.get(kind, key).open_until)
+
+    def record(self, host: str, proxy: str | None, error_class: str | None) -> None:
+        if error_class is None:
+            self.get('host', host).record_success()
+            if proxy:
+                self.get('proxy', proxy).record_success()
+        elif error_class == SERVER:
+            self.get('host', host).record_failure()
+        elif error_class in (PROXY, TRANSIENT):
+            if proxy:
+                self.get('proxy', proxy).record_failure()
+            else:
+                self.get('host', host).record_failure()
+
+    def open_circuits(self) -> list[tuple[str, str, float]]:
+        return [(kind, key, breaker.open_until) for (kind, key), breaker in self.breakers.items() if breaker.is_open]
+
+
+retry_policy = RetryPolicy()
+circuit_breakers = CircuitBreakers(
+    threshold=settings.CIRCUIT_FAILURE_THRESHOLD,
+    reset_timeout=settings.CIRCUIT_RESET_TIMEOUT
+)
@@ -0,0 +1,99 @@
+import asyncio
+import heapq
+import itertools
+import time as tm
+
+
+class Scheduler:
+    """Wakes sleeping sessions at their deadlines from a single timer loop.
+
+    Each session parks on a future instead of a long ``asyncio.sleep``; the
+    loop keeps a heap of ``(deadline, seq, session_name)`` entries and only
+    ever waits for the earliest one.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._counter = itertools.count()
+        self._entries = {}
+        self._changed = None
+        self._task = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def schedule(self, session_name: str, deadline: float) -> asyncio.Future:
+        self.cancel(session_name)
+
+        future = asyncio.get_running_loop().create_future()
+        entry = [deadline, next(self._counter), session_name, future]
+        self._entries[session_name] = entry
+        heapq.heappush(self._heap, entry)
+
+        self._ensure_running()
+        if self._heap[0] is entry:
+            self._changed.set()
+
+        return future
+
+    async def sleep_until(self, session_name: str, deadline: float) -> None:
+        future = self.schedule(session_name, deadline)
+        try:
+            await future
+        finally:
+            self.cancel(session_name, future)
+
+    def cancel(self, session_name: str, future: asyncio.Future | None = None) -> None:
+        entry = self._entries.get(session_name)
+        if entry is None or (future is not None and entry[3] is not future):
+            return
+
+        del self._entries[session_name]
+        entry[3].cancel()
+
+    def next_wakeups(self, count: int = 10) -> list[tuple[str, float]]:
+        # обходим кучу от корня, не трогая остальные записи: стоимость зависит от count, а не от числа сессий
+        wakeups = []
+        candidates = [(self._heap[0], 0)] if self._heap else []
+        while candidates and len(wakeups) < count:
+            entry, index = heapq.heappop(candidates)
+            if not entry[3].done():
+                wakeups.append((entry[2], entry[0]))
+            for child in (2 * index + 1, 2 * index + 2):
+                if child < len(self._heap):
+                    heapq.heappush(candidates, (self._heap[child], child))
+        return wakeups
+
+    def _ensure_running(self):
+        if self._changed is None:
+            self._changed = asyncio.Event()
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            while self._heap and self._heap[0][3].done():
+                heapq.heappop(self._heap)
+
+            self._changed.clear()
+
+            if not self._heap:
+                await self._changed.wait()
+                continue
+
+            delay = self._heap[0][0] - tm.time()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._changed.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            entry = heapq.heappop(self._heap)
+            if self._entries.get(entry[2]) is entry:
+                del self._entries[entry[2]]
+            entry[3].set_result(None)
+
+
+scheduler = Scheduler()
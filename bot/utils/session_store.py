@@ -0,0 +1,262 @@
+import os
+import json
+import base64
+import sqlite3
+import time as tm
+
+from contextlib import contextmanager
+
+from bot.config import settings
+
+STATE_COLUMNS = ('balance', 'farming_reward', 'farming_duration', 'farm_started_at',
+                 'level', 'stake_finish_at', 'next_wake_up', 'updated_at')
+
+
+def get_token_exp(token: str) -> float | None:
+    try:
+        payload = token.split('.')[1]
+        payload += '=' * (-len(payload) % 4)
+        exp = json.loads(base64.urlsafe_b64decode(payload)).get('exp')
+        if exp:
+            return float(exp)
+    except (IndexError, ValueError, AttributeError):
+        pass
+
+    return None
+
+
+def get_token_expiry(token: str, issued_at: float, default_ttl: int) -> float:
+    exp = get_token_exp(token)
+    return exp if exp is not None else issued_at + default_ttl
+
+
+def get_min_token_ttl() -> int:
+    # меньше этого токен считался бы истёкшим сразу после выдачи
+    return 2 * settings.TOKEN_REFRESH_MARGIN
+
+
+class SessionStore:
+    def __init__(self, path: str):
+        self.path = path
+        self._db = None
+        self._user_agents = None
+
+    @property
+    def db(self) -> sqlite3.Connection:
+        if self._db is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self._db = sqlite3.connect(self.path, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.executescript("""
+                CREATE TABLE IF NOT EXISTS tokens (
+                    session_name TEXT PRIMARY KEY,
+                    token TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    expires_at REAL NOT NULL,
+                    level INTEGER NOT NULL,
+                    level_descriptions TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS peers (
+                    session_name TEXT NOT NULL,
+                    username TEXT NOT NULL,
+                    peer_id INTEGER NOT NULL,
+                    access_hash INTEGER NOT NULL,
+                    PRIMARY KEY (session_name, username)
+                );
+                CREATE TABLE IF NOT EXISTS user_agents (
+                    session_name TEXT PRIMARY KEY,
+                    user_agent TEXT NOT NULL,
+                    sec_ch_ua TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS states (
+                    session_name TEXT PRIMARY KEY,
+                    balance INTEGER NOT NULL,
+                    farming_reward INTEGER NOT NULL,
+                    farming_duration INTEGER NOT NULL,
+                    farm_started_at REAL,
+                    level INTEGER NOT NULL,
+                    stake_finish_at REAL,
+                    next_wake_up REAL,
+                    updated_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS tg_sessions (
+                    session_name TEXT PRIMARY KEY,
+                    session_string TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL
+                );
+            """)
+        return self._db
+
+    @contextmanager
+    def transaction(self):
+        # Соединение в режиме autocommit: без явного BEGIN каждая строка executemany коммитится отдельно
+        self.db.execute("BEGIN")
+        try:
+            yield self.db
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+        self.db.execute("COMMIT")
+
+    def get_meta(self, key: str, default=None):
+        row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set_meta(self, key: str, value) -> None:
+        self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+
+    def get_token(self, session_name: str) -> dict | None:
+        row = self.db.execute(
+            "SELECT token, created_at, expires_at, level, level_descriptions FROM tokens WHERE session_name = ?",
+            (session_name,)
+        ).fetchone()
+
+        if row is None:
+            return None
+
+        return {
+            'token': row[0],
+            'created_at': row[1],
+            'expires_at': row[2],
+            'level': row[3],
+            'levelDescriptions': json.loads(row[4])
+        }
+
+    def save_token(self, session_name: str, login_data: dict) -> dict:
+        created_at = tm.time()
+        default_ttl = max(self.get_meta('token_ttl', settings.TOKEN_TTL), get_min_token_ttl())
+        cached = {
+            'token': login_data['token'],
+            'created_at': created_at,
+            'expires_at': get_token_expiry(login_data['token'], created_at, default_ttl),
+            'level': int(login_data.get('level', 0)),
+            'levelDescriptions': login_data.get('levelDescriptions', [])
+        }
+
+        self.db.execute(
+            "INSERT OR REPLACE INTO tokens VALUES (?, ?, ?, ?, ?, ?)",
+            (session_name, cached['token'], cached['created_at'], cached['expires_at'],
+             cached['level'], json.dumps(cached['levelDescriptions']))
+        )
+        return cached
+
+    def update_token_level(self, session_name: str, level: int) -> None:
+        self.db.execute("UPDATE tokens SET level = ? WHERE session_name = ?", (level, session_name))
+
+    def expire_token(self, session_name: str) -> None:
+        cached = self.get_token(session_name)
+        if cached is None:
+            return
+
+        now = tm.time()
+        if now < cached['expires_at'] and get_token_exp(cached['token']) is None:
+            # Сервер отозвал токен раньше срока: сдвигаем время жизни к наблюдаемому наполовину,
+            # чтобы единичный ранний 401 не урезал его для всех сессий
+            current_ttl = self.get_meta('token_ttl', settings.TOKEN_TTL)
+            learned_ttl = (current_ttl + int(now - cached['created_at'])) // 2
+            self.set_meta('token_ttl', max(learned_ttl, get_min_token_ttl()))
+
+        self.db.execute("UPDATE tokens SET expires_at = ? WHERE session_name = ?", (now, session_name))
+
+    def get_peer(self, session_name: str, username: str) -> tuple[int, int] | None:
+        return self.db.execute(
+            "SELECT peer_id, access_hash FROM peers WHERE session_name = ? AND username = ?",
+            (session_name, username)
+        ).fetchone()
+
+    def save_peer(self, session_name: str, username: str, peer_id: int, access_hash: int) -> None:
+        self.db.execute(
+            "INSERT OR REPLACE INTO peers VALUES (?, ?, ?, ?)",
+            (session_name, username, peer_id, access_hash)
+        )
+
+    def delete_peer(self, session_name: str, username: str) -> None:
+        self.db.execute("DELETE FROM peers WHERE session_name = ? AND username = ?", (session_name, username))
+
+    def save_state(self, session_name: str, state: dict) -> None:
+        state = {**state, 'updated_at': tm.time()}
+        self.db.execute(
+            f"INSERT OR REPLACE INTO states (session_name, {', '.join(STATE_COLUMNS)}) "
+            f"VALUES (?, {', '.join('?' * len(STATE_COLUMNS))})",
+            (session_name, *[state.get(column) for column in STATE_COLUMNS])
+        )
+
+    def load_states(self) -> dict[str, dict]:
+        return {
+            row[0]: dict(zip(STATE_COLUMNS, row[1:]))
+            for row in self.db.execute(f"SELECT session_name, {', '.join(STATE_COLUMNS)} FROM states")
+        }
+
+    @property
+    def user_agents(self) -> dict[str, tuple[str, str]]:
+        if self._user_agents is None:
+            self.migrate_user_agents(settings.USER_AGENTS_DIR)
+            self._user_agents = {
+                row[0]: (row[1], row[2])
+                for row in self.db.execute("SELECT session_name, user_agent, sec_ch_ua FROM user_agents")
+            }
+        return self._user_agents
+
+    def get_user_agent(self, session_name: str) -> tuple[str, str] | None:
+        return self.user_agents.get(session_name)
+
+    def save_user_agents(self, user_agents: dict[str, tuple[str, str]]) -> None:
+        if not user_agents:
+            return
+
+        with self.transaction():
+            self.db.executemany(
+                "INSERT OR REPLACE INTO user_agents VALUES (?, ?, ?)",
+                [(session_name, user_agent, sec_ch_ua) for session_name, (user_agent, sec_ch_ua) in user_agents.items()]
+            )
+        self.user_agents.update(user_agents)
+
+    def migrate_user_agents(self, directory: str) -> int:
+        if self.get_meta('user_agents_migrated') or not os.path.isdir(directory):
+            return 0
+
+        user_agents = {}
+        for filename in os.listdir(directory):
+            if not filename.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(directory, filename), 'r') as user_agent_file:
+                    data = json.load(user_agent_file)
+                user_agents[data['session_name']] = (data['user_agent'], data['sec_ch_ua'])
+            except (OSError, ValueError, KeyError, TypeError):
+                continue
+
+        with self.transaction():
+            self.db.executemany(
+                "INSERT OR IGNORE INTO user_agents VALUES (?, ?, ?)",
+                [(session_name, user_agent, sec_ch_ua) for session_name, (user_agent, sec_ch_ua) in user_agents.items()]
+            )
+            self.set_meta('user_agents_migrated', True)
+
+        return len(user_agents)
+
+    def get_tg_session(self, session_name: str) -> str | None:
+        row = self.db.execute("SELECT session_string FROM tg_sessions WHERE session_name = ?", (session_name,)).fetchone()
+        return row[0] if row else None
+
+    def get_tg_sessions(self) -> dict[str, str]:
+        return dict(self.db.execute("SELECT session_name, session_string FROM tg_sessions ORDER BY session_name"))
+
+    def get_tg_session_names(self) -> list[str]:
+        return [row[0] for row in self.db.execute("SELECT session_name FROM tg_sessions ORDER BY session_name")]
+
+    def save_tg_sessions(self, session_strings: dict[str, str]) -> None:
+        with self.transaction():
+            self.db.executemany("INSERT OR REPLACE INTO tg_sessions VALUES (?, ?)", session_strings.items())
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+session_store = SessionStore(settings.SESSION_STORE_PATH)
@@ -0,0 +1,92 @@
+import os
+import asyncio
+import argparse
+
+from pathlib import Path
+from pyrogram.storage import FileStorage, MemoryStorage
+
+from bot.config import settings
+from bot.utils.logger import logger
+from bot.utils.session_store import session_store
+
+SESSION_FIELDS = ('dc_id', 'api_id', 'test_mode', 'auth_key', 'user_id', 'is_bot')
+
+
+async def read_session_file(session_name: str, directory: str) -> str:
+    storage = FileStorage(session_name, Path(directory))
+    await storage.open()
+    try:
+        # старые сессии pyrogram не хранят api_id, а без него строку не собрать
+        if await storage.api_id() is None:
+            await storage.api_id(settings.API_ID)
+        return await storage.export_session_string()
+    finally:
+        await storage.close()
+
+
+async def write_session_file(session_name: str, session_string: str, directory: str) -> None:
+    memory = MemoryStorage(session_name, session_string)
+    await memory.open()
+
+    storage = FileStorage(session_name, Path(directory))
+    await storage.open()
+    try:
+        for field in SESSION_FIELDS:
+            await getattr(storage, field)(await getattr(memory, field)())
+        await storage.save()
+    finally:
+        await storage.close()
+        await memory.close()
+
+
+async def import_sessions(directory: str) -> int:
+    session_strings = {}
+    for filename in sorted(os.listdir(directory)):
+        if not filename.endswith('.session'):
+            continue
+
+        session_name = os.path.splitext(filename)[0]
+        try:
+            session_strings[session_name] = await read_session_file(session_name, directory)
+        except Exception as error:
+            logger.warning(f"{session_name} | Skipped, failed to read session file: {error}")
+
+    session_store.save_tg_sessions(session_strings)
+    return len(session_strings)
+
+
+async def export_sessions(directory: str, overwrite: bool = False) -> int:
+    os.makedirs(directory, exist_ok=True)
+
+    exported = 0
+    for session_name, session_string in session_store.get_tg_sessions().items():
+        path = os.path.join(directory, f"{session_name}.session")
+        if os.path.exists(path) and not overwrite:
+            continue
+
+        try:
+            await write_session_file(session_name, session_string, directory)
+            exported += 1
+        except Exception as error:
+            logger.warning(f"{session_name} | Skipped, failed to write session file: {error}")
+
+    return exported
+
+
+async def main(args: argparse.Namespace) -> None:
+    if args.command == 'import':
+        count = await import_sessions(args.dir)
+        logger.success(f"Imported <c>{count}</c> sessions from {args.dir} into {session_store.path}")
+    else:
+        count = await export_sessions(args.dir, overwrite=args.overwrite)
+        logger.success(f"Exported <c>{count}</c> sessions from {session_store.path} into {args.dir}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Move Telegram sessions between session files and the session store")
+    parser.add_argument("command", choices=['import', 'export'])
+    parser.add_argument("--dir", default="sessions", help="Directory with .session files")
+    parser.add_argument("--overwrite", action="store_true", help="Replace existing files on export")
+    args = parser.parse_args()
+
+    asyncio.run(main(args))
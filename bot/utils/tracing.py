@@ -0,0 +1,231 @@
+import os
+import sys
+import json
+import asyncio
+import argparse
+import statistics
+import time as tm
+import aiohttp
+
+from types import SimpleNamespace
+
+from bot.config import settings
+from bot.utils.metrics import get_endpoint, get_proxy_label
+
+FLUSH_INTERVAL = 1.0
+MAX_BUFFER = 1000
+
+
+class TraceWriter:
+    """Buffers trace records and appends them to a JSONL file off the event loop."""
+
+    def __init__(self, path: str, flush_interval: float = FLUSH_INTERVAL, max_buffer: int = MAX_BUFFER):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.buffer: list[dict] = []
+        self._flush_needed = asyncio.Event()
+        self._flusher = None
+
+    def write(self, record: dict) -> None:
+        self.buffer.append(record)
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._run())
+        if len(self.buffer) >= self.max_buffer:
+            self._flush_needed.set()
+
+    def _append(self, data: str) -> None:
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.path, 'a') as trace_file:
+            trace_file.write(data)
+
+    async def flush(self) -> None:
+        records, self.buffer = self.buffer, []
+        if records:
+            data = ''.join(json.dumps(record, separators=(',', ':')) + '\n' for record in records)
+            await asyncio.to_thread(self._append, data)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_needed.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_needed.clear()
+            await self.flush()
+
+    async def close(self) -> None:
+        if self._flusher is not None:
+            self._flusher.cancel()
+            self._flusher = None
+        await self.flush()
+
+
+def elapsed_ms(start: float | None, end: float | None) -> float | None:
+    if start is None or end is None:
+        return None
+    return round((end - start) * 1000, 1)
+
+
+class RequestTracer:
+    """Per-request phase timings collected with ``aiohttp.TraceConfig``.
+
+    The record is handed to the writer as soon as the response headers arrive
+    and keeps being updated while the body is read, so body timings and sizes
+    are in place by the time the buffer is flushed.
+    """
+
+    def __init__(self, path: str):
+        self.writer = TraceWriter(path)
+
+    @property
+    def path(self) -> str:
+        return self.writer.path
+
+    @path.setter
+    def path(self, value: str) -> None:
+        self.writer.path = value
+
+    def get_trace_configs(self, session_name: str, proxy: str | None) -> list[aiohttp.TraceConfig] | None:
+        if not settings.TRACE_REQUESTS:
+            return None
+
+        proxy_label = get_proxy_label(proxy)
+
+        async def on_request_start(session, context, params):
+            context.start = tm.perf_counter()
+            context.dns_start = context.dns_end = context.queued_start = context.queued_end = None
+            context.connect_start = context.connect_end = None
+            context.record = {
+                'ts': round(tm.time(), 3),
+                'session': session_name,
+                'proxy': proxy_label,
+                'method': params.method,
+                'endpoint': get_endpoint(str(params.url))
+            }
+
+        async def on_connection_queued_start(session, context, params):
+            context.queued_start = tm.perf_counter()
+
+        async def on_connection_queued_end(session, context, params):
+            context.queued_end = tm.perf_counter()
+
+        async def on_dns_resolvehost_start(session, context, params):
+            context.dns_start = tm.perf_counter()
+
+        async def on_dns_resolvehost_end(session, context, params):
+            context.dns_end = tm.perf_counter()
+
+        async def on_connection_create_start(session, context, params):
+            context.connect_start = tm.perf_counter()
+
+        async def on_connection_create_end(session, context, params):
+            context.connect_end = tm.perf_counter()
+
+        def finish(context, **fields) -> None:
+            record = context.record
+            record.update(
+                queue_ms=elapsed_ms(context.queued_start, context.queued_end),
+                dns_ms=elapsed_ms(context.dns_start, context.dns_end),
+                # connect включает подключение к прокси и TLS: aiohttp не разделяет эти фазы
+                connect_ms=elapsed_ms(context.connect_start, context.connect_end),
+                ttfb_ms=elapsed_ms(context.start, tm.perf_counter()),
+                **fields
+            )
+            self.writer.write(record)
+
+        async def on_request_end(session, context, params):
+            finish(context, status=params.response.status, bytes=0, body_ms=0.0)
+            context.headers_end = tm.perf_counter()
+
+        async def on_request_exception(session, context, params):
+            finish(context, status=type(params.exception).__name__)
+
+        async def on_response_chunk_received(session, context, params):
+            record = context.record
+            if 'status' in record:
+                record['bytes'] += len(params.chunk)
+                record['body_ms'] = elapsed_ms(context.headers_end, tm.perf_counter())
+
+        trace_config = aiohttp.TraceConfig(trace_config_ctx_factory=SimpleNamespace)
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_connection_queued_start.append(on_connection_queued_start)
+        trace_config.on_connection_queued_end.append(on_connection_queued_end)
+        trace_config.on_dns_resolvehost_start.append(on_dns_resolvehost_start)
+        trace_config.on_dns_resolvehost_end.append(on_dns_resolvehost_end)
+        trace_config.on_connection_create_start.append(on_connection_create_start)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_request_end.append(on_request_end)
+        trace_config.on_request_exception.append(on_request_exception)
+        trace_config.on_response_chunk_received.append(on_response_chunk_received)
+
+        return [trace_config]
+
+    async def close(self) -> None:
+        await self.writer.close()
+
+
+def percentile(values: list[float], percent: int) -> float:
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method='inclusive')[percent - 1]
+
+
+def read_records(paths: list[str]):
+    for path in paths:
+        with open(path, 'r') as trace_file:
+            for line in trace_file:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def summarize(paths: list[str], key: str, top: int) -> list[dict]:
+    groups: dict[str, dict] = {}
+    for record in read_records(paths):
+        group = groups.setdefault(record.get(key) or '-', {'latencies': [], 'errors': 0})
+        if isinstance(record.get('status'), int) and record['status'] < 400:
+            latency = (record.get('ttfb_ms') or 0) + (record.get('body_ms') or 0)
+            group['latencies'].append(latency)
+        else:
+            group['errors'] += 1
+
+    rows = []
+    for name, group in groups.items():
+        latencies = group['latencies']
+        rows.append({
+            key: name,
+            'requests': len(latencies) + group['errors'],
+            'errors': group['errors'],
+            'p50_ms': percentile(latencies, 50) if latencies else 0.0,
+            'p95_ms': percentile(latencies, 95) if latencies else 0.0,
+            'p99_ms': percentile(latencies, 99) if latencies else 0.0
+        })
+
+    return sorted(rows, key=lambda row: row['p99_ms'], reverse=True)[:top]
+
+
+def print_summary(rows: list[dict], key: str) -> None:
+    print(f"{key:<40} {'requests':>9} {'errors':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for row in rows:
+        print(f"{row[key][:40]:<40} {row['requests']:>9} {row['errors']:>7} "
+              f"{row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f} {row['p99_ms']:>9.1f}")
+    print()
+
+
+request_tracer = RequestTracer(settings.TRACE_FILE)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Rank proxies and endpoints by tail latency from request traces")
+    parser.add_argument("paths", nargs='*', default=[settings.TRACE_FILE], help="JSONL trace files")
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    missing = [path for path in args.paths if not os.path.exists(path)]
+    if missing:
+        sys.exit(f"Trace file not found: {', '.join(missing)}")
+
+    for key in ('proxy', 'endpoint'):
+        print_summary(summarize(args.paths, key, args.top), key)
@@ -0,0 +1,153 @@
+import asyncio
+import heapq
+import signal
+import sys
+import time as tm
+import multiprocessing as mp
+
+from bot.config import settings
+from bot.utils.logger import logger, setup_logger
+
+STATUS_INTERVAL = 60
+
+
+def split_sessions(session_names: list[str], workers: int, proxies: dict | None = None) -> list[list[str]]:
+    # Лимиты, пулы соединений и проверки прокси живут внутри процесса,
+    # поэтому все сессии одного прокси отдаём одному воркеру
+    groups: dict[str, list[str]] = {}
+    for session_name in session_names:
+        proxy = (proxies or {}).get(session_name)
+        if isinstance(proxy, list):
+            proxy = proxy[0] if proxy else None
+        groups.setdefault(proxy or session_name, []).append(session_name)
+
+    chunks = [[] for _ in range(workers)]
+    heap = [(0, index) for index in range(workers)]
+    for group in sorted(groups.values(), key=len, reverse=True):
+        load, index = heapq.heappop(heap)
+        chunks[index].extend(group)
+        heapq.heappush(heap, (load + len(group), index))
+
+    return [chunk for chunk in chunks if chunk]
+
+
+async def report_status(index: int, queue: mp.Queue, session_count: int) -> None:
+    from bot.utils.auth_gate import auth_gate
+    from bot.utils.rate_limiter import rate_limiter
+    from bot.utils.scheduler import scheduler
+
+    while True:
+        queue.put(('status', index, {
+            'sessions': session_count,
+            'sleeping': len(scheduler),
+            'auth_queue': auth_gate.queue_depth,
+            'request_queue': rate_limiter.queue_depth
+        }))
+        await asyncio.sleep(STATUS_INTERVAL)
+
+
+async def run_worker(index: int, session_names: list[str], queue: mp.Queue) -> None:
+    from bot.core.tapper import run_tapper
+    from bot.utils.connection_manager import connection_manager
+    from bot.utils.session_store import session_store
+    from bot.utils.client_factory import tg_client_factory
+    from bot.utils.launcher import get_sessions, get_proxies
+    from bot.utils.metrics import metrics
+    from bot.utils.tracing import request_tracer
+
+    loop = asyncio.get_running_loop()
+    current_task = asyncio.current_task()
+    try:
+        loop.add_signal_handler(signal.SIGTERM, current_task.cancel)
+    except NotImplementedError:
+        pass
+
+    session_names = await get_sessions(session_names)
+    proxies = get_proxies() if settings.USE_PROXY else {}
+    saved_states = session_store.load_states()
+
+    request_tracer.path = f"{settings.TRACE_FILE}.{index}"
+    metrics.sessions.set(len(session_names))
+    if settings.METRICS_ENABLED:
+        # у каждого воркера свой реестр метрик и свой порт
+        await metrics.start(settings.METRICS_HOST, settings.METRICS_PORT + index)
+
+    status_task = asyncio.create_task(report_status(index, queue, len(session_names)))
+    try:
+        await asyncio.gather(*[
+            run_tapper(session_name=session_name, proxy=proxies.get(session_name) if settings.USE_PROXY else None,
+                       saved_state=saved_states.get(session_name))
+            for session_name in session_names
+        ])
+    except asyncio.CancelledError:
+        pass
+    finally:
+        status_task.cancel()
+        await metrics.stop()
+        await request_tracer.close()
+        await connection_manager.close_all()
+        await tg_client_factory.close_all()
+
+
+def worker_main(index: int, session_names: list[str], queue: mp.Queue) -> None:
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    setup_logger(write=lambda data: queue.put(('log', data)))
+
+    asyncio.run(run_worker(index, session_names, queue))
+
+
+def forward_messages(queue: mp.Queue, statuses: dict) -> None:
+    while True:
+        message = queue.get()
+        if message is None:
+            return
+
+        if message[0] == 'log':
+            sys.stdout.write(message[1])
+            sys.stdout.flush()
+        elif message[0] == 'status':
+            statuses[message[1]] = message[2]
+
+
+async def run_workers(session_names: list[str], workers: int) -> None:
+    from bot.utils.launcher import get_proxies
+
+    proxies = get_proxies() if settings.USE_PROXY else {}
+    ctx = mp.get_context('spawn')
+    queue = ctx.Queue()
+    statuses = {}
+
+    processes = [
+        ctx.Process(target=worker_main, args=(index, chunk, queue), name=f"worker-{index}", daemon=True)
+        for index, chunk in enumerate(split_sessions(session_names, workers, proxies))
+    ]
+
+    for process in processes:
+        process.start()
+
+    logger.info(f"Started <c>{len(processes)}</c> workers for <c>{len(session_names)}</c> sessions")
+
+    forwarder = asyncio.create_task(asyncio.to_thread(forward_messages, queue, statuses))
+    started_at = tm.monotonic()
+    try:
+        while any(process.is_alive() for process in processes):
+            await asyncio.sleep(STATUS_INTERVAL)
+
+            alive = sum(process.is_alive() for process in processes)
+            logger.info(
+                f"Workers: <c>{alive}/{len(processes)}</c> | "
+                f"Sessions: <c>{sum(status['sessions'] for status in statuses.values())}</c> | "
+                f"Sleeping: <c>{sum(status['sleeping'] for status in statuses.values())}</c> | "
+                f"Auth queue: <y>{sum(status['auth_queue'] for status in statuses.values())}</y> | "
+                f"Request queue: <y>{sum(status['request_queue'] for status in statuses.values())}</y> | "
+                f"Uptime: {int(tm.monotonic() - started_at)}s")
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        for process in processes:
+            process.join(timeout=10)
+
+        queue.put(None)
+        await forwarder
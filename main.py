@@ -1,19 +1,23 @@
+import time
+started_at = time.perf_counter()
+
 import asyncio
 import sys
 import os
 import signal
 
-from bot.utils.banner import banner
 from bot.utils.logger import logger
 from bot.utils.launcher import process
 from bot.utils.connection_manager import connection_manager
 
+import_time = time.perf_counter() - started_at
+
 def suppress_errors():
     sys.stderr = open(os.devnull, 'w')
 
 async def main():
     try:
-        await process()
+        await process(started_at=started_at, import_time=import_time)
     except asyncio.CancelledError:
         pass
     finally:
@@ -24,7 +28,10 @@ def signal_handler(signum, frame):
 
 
 if __name__ == '__main__':
-    banner()
+    if '--headless' not in sys.argv:
+        from bot.utils.banner import banner
+        banner()
+
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
 